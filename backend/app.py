@@ -4,16 +4,23 @@ from .config import Config
 from .db import db, init_db
 from .auth import auth_bp
 from .routes import api_bp
+from .metrics import init_metrics
+from .compress import init_compression
 
 def create_app():
     app = Flask(__name__)
     app.config['SECRET_KEY'] = Config.SECRET_KEY
     app.config['SQLALCHEMY_DATABASE_URI'] = Config.SQLALCHEMY_DATABASE_URI
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if not Config.SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
+        # SQLite (benchmarks, smoke runs) keeps SQLAlchemy's own pool choice
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(Config.ENGINE_OPTIONS)
 
     CORS(app)
 
     init_db(app)
+    init_metrics(app)
+    init_compression(app)
 
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(api_bp, url_prefix="/api")
@@ -25,6 +32,8 @@ def create_app():
     return app
 
 if __name__ == "__main__":
+    # Development server (reloader + debugger). For desks in production use
+    # `python -m backend.wsgi` (waitress) or gunicorn with backend.wsgi:app.
     from .config import Config
     app = create_app()
     app.run(host=Config.APP_HOST, port=Config.APP_PORT, debug=True)
@@ -0,0 +1,166 @@
+"""Movement retention: keep stock_movements small by moving old rows to stock_movements_archive.
+
+    python -m backend.archive                                  # older than ARCHIVE_AFTER_MONTHS
+    python -m backend.archive --months 24 --export-dir /srv/blood_desk/archive
+    python -m backend.archive --dry-run                        # only count
+
+Run it from cron (e.g. nightly). Whole calendar months older than the window move
+in chunks of ARCHIVE_CHUNK rows, oldest first; each chunk is one short transaction
+(INSERT into the archive, DELETE by primary key from the hot table), so desks keep
+adjusting stock while it runs and an interrupted run simply resumes. With
+--export-dir every month that received rows is then written out whole from
+stock_movements_archive as movements-YYYY-MM.csv.gz. The months are noted in
+.pending in that directory before each chunk commits, so months whose export was
+cut short are written again by the next run.
+
+Nothing derived from movements changes: Stock.units is a running total kept by
+adjust_stock, and stock_daily_rollup keeps its rows for archived days (rollup
+rebuilds read both tables). /api/stock/movements and the movements export read
+both tables too; the change feed and desk sync only ever need recent rows.
+
+Why not MySQL monthly partitions: InnoDB cannot partition a table with foreign
+keys (stock_movements.user_id), and the partition key would have to join the
+primary key, which the change feed and sync cursors rely on being `id` alone.
+"""
+import argparse
+import csv
+import gzip
+import os
+import time
+from datetime import date, datetime
+
+from sqlalchemy import func, select
+
+from .config import Config
+from .db import db
+from .models import StockMovement, StockMovementArchive
+
+HOT = StockMovement.__table__
+ARCHIVE = StockMovementArchive.__table__
+COLUMNS = [c.name for c in HOT.c]
+
+
+def cutoff(months, today=None):
+    """Start of the oldest month kept: with months=13 on 2026-10-18, 2025-09-01."""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def pending(before):
+    return db.session.query(func.count()).select_from(HOT).filter(HOT.c.timestamp < before).scalar()
+
+
+def archive(before, chunk=None, export_dir=None, pause=None, progress=None):
+    """Move every movement with timestamp < `before` into the archive table,
+    `chunk` rows per transaction. Returns the number of rows moved."""
+    chunk = chunk or Config.ARCHIVE_CHUNK
+    pause = Config.ARCHIVE_PAUSE if pause is None else pause
+    moved = 0
+    while True:
+        # Oldest first via ix_movements_time; plain read, no locks taken
+        rows = db.session.execute(
+            select(HOT).where(HOT.c.timestamp < before).order_by(HOT.c.timestamp, HOT.c.id).limit(chunk)
+        ).all()
+        if not rows:
+            break
+        if export_dir:
+            mark_pending(export_dir, {r.timestamp.strftime("%Y-%m") for r in rows})
+        try:
+            db.session.execute(ARCHIVE.insert(), [r._asdict() for r in rows])
+            db.session.execute(HOT.delete().where(HOT.c.id.in_([r.id for r in rows])))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        moved += len(rows)
+        if progress:
+            progress(moved)
+        time.sleep(pause)  # let waiting writers in between chunks
+    if export_dir:
+        export_pending(export_dir)
+    return moved
+
+
+def _pending_path(export_dir):
+    return os.path.join(export_dir, ".pending")
+
+
+def mark_pending(export_dir, months):
+    """Record months whose export is due, durably, before their rows move."""
+    os.makedirs(export_dir, exist_ok=True)
+    with open(_pending_path(export_dir), "a", encoding="utf-8") as f:
+        f.write("".join(f"{m}\n" for m in sorted(months)))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def export_pending(export_dir):
+    """Write every month listed in .pending, then clear it. Returns the months."""
+    path = _pending_path(export_dir)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        months = sorted({line.strip() for line in f if line.strip()})
+    for month in months:
+        export_month(month, export_dir)
+    os.remove(path)
+    return months
+
+
+def export_month(month, export_dir):
+    """Write movements-YYYY-MM.csv.gz from stock_movements_archive, replacing any
+    earlier copy only once the new file is complete."""
+    start = datetime.strptime(month, "%Y-%m")
+    end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+    path = os.path.join(export_dir, f"movements-{month}.csv.gz")
+    rows = db.session.execute(
+        select(*[ARCHIVE.c[c] for c in COLUMNS])
+        .where(ARCHIVE.c.timestamp >= start, ARCHIVE.c.timestamp < end)
+        .order_by(ARCHIVE.c.timestamp, ARCHIVE.c.id)
+        .execution_options(yield_per=5000))
+    with gzip.open(path + ".tmp", "wt", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(COLUMNS)
+        for r in rows:
+            w.writerow(["" if v is None else v.isoformat() if isinstance(v, datetime) else v for v in r])
+    os.replace(path + ".tmp", path)
+
+
+def movement_totals():
+    """Net units per blood group over all movements, hot and archived."""
+    totals = {}
+    for model in (StockMovement, StockMovementArchive):
+        for bg, units in db.session.query(model.blood_group, func.sum(model.delta)).group_by(model.blood_group):
+            totals[bg] = totals.get(bg, 0) + int(units or 0)
+    return totals
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--months", type=int, default=Config.ARCHIVE_AFTER_MONTHS,
+                    help="whole months kept in stock_movements besides the current one")
+    ap.add_argument("--chunk", type=int, default=Config.ARCHIVE_CHUNK, help="rows per transaction")
+    ap.add_argument("--export-dir", help="also write archived months to movements-YYYY-MM.csv.gz here")
+    ap.add_argument("--today", type=date.fromisoformat, default=None, help="YYYY-MM-DD (default: today)")
+    ap.add_argument("--dry-run", action="store_true", help="only report how many rows would move")
+    args = ap.parse_args()
+
+    Config.SLOW_QUERY_MS = float("inf")  # chunk statements are expected to take a while
+    from .app import create_app
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        before = cutoff(args.months, args.today)
+        count = pending(before)
+        print(f"{count} movements before {before:%Y-%m-%d}")
+        if args.dry_run or not (count or args.export_dir):
+            return
+        t0 = time.perf_counter()
+        moved = archive(before, args.chunk, args.export_dir,
+                        progress=lambda n: print(f"  {n}/{count}", end="\r", flush=True))
+        print(f"\narchived {moved} movements in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,71 @@
-from flask import Blueprint, request
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request, g
+import base64
 import bcrypt
+import hashlib
+import hmac
+import time
+from .config import Config
 from .db import db
 from .models import User
 
 auth_bp = Blueprint("auth", __name__)
 
-# Simple token-less session for local desktop use: client stores username after success.
-# For production, use JWT/cookies. Here, keep it simple per project scope.
+# Session tokens: login checks the password once (bcrypt, deliberately slow) and
+# returns "<payload>.<signature>", an HMAC-SHA256 over "user_id:role:expires" with
+# Config.SECRET_KEY. Every /api request then only recomputes one HMAC; no database
+# lookup and no bcrypt on the hot path. Rotating SECRET_KEY logs everyone out.
+
+# bcrypt is CPU-bound; a small pool caps how many run at once so a burst of logins
+# can't occupy every request thread.
+_bcrypt_pool = ThreadPoolExecutor(max_workers=Config.BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
+
+def _sign(payload):
+    return hmac.new(Config.SECRET_KEY.encode("utf-8"), payload, hashlib.sha256).digest()
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def issue_token(user, ttl=None):
+    expires = int(time.time() + (ttl or Config.TOKEN_TTL))
+    payload = f"{user.id}:{user.role}:{expires}".encode("utf-8")
+    return f"{_b64(payload)}.{_b64(_sign(payload))}", expires
+
+
+def verify_token(token):
+    """(user_id, role) for a valid, unexpired token, else None."""
+    try:
+        payload_b64, sig_b64 = token.split(".")
+        payload = _unb64(payload_b64)
+        if not hmac.compare_digest(_sign(payload), _unb64(sig_b64)):
+            return None
+        user_id, role, expires = payload.decode("utf-8").split(":")
+        if int(expires) < time.time():
+            return None
+        return int(user_id), role
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def require_token():
+    """before_request hook for protected blueprints: sets g.user_id / g.role or returns 401."""
+    if request.method == "OPTIONS" or not Config.API_AUTH:
+        return None
+    header = request.headers.get("Authorization", "")
+    claims = verify_token(header[7:]) if header.startswith("Bearer ") else None
+    if claims is None:
+        return {"error": "Authentication required"}, 401
+    g.user_id, g.role = claims
+    return None
+
+
 @auth_bp.post("/login")
 def login():
     data = request.get_json() or {}
@@ -17,7 +76,8 @@ def login():
         return {"error": "Username and password required"}, 400
 
     user = User.query.filter_by(username=username).first()
-    if not user or not bcrypt.checkpw(password.encode("utf-8"), user.password_hash):
+    if not user or not _bcrypt_pool.submit(bcrypt.checkpw, password.encode("utf-8"), user.password_hash).result():
         return {"error": "Invalid credentials"}, 401
 
-    return {"user": user.to_dict()}
+    token, expires = issue_token(user)
+    return {"user": user.to_dict(), "token": token, "expires": expires}
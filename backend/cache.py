@@ -0,0 +1,57 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import Response, request
+
+from .config import Config
+
+# Short-TTL cache for hot read endpoints (stock, analytics). Entries hold the
+# encoded JSON body plus an ETag, so cache hits skip both the database and the
+# encoder, and desks that already have the body get a 304. Stock writes call
+# invalidate(); other worker processes converge within CACHE_TTL seconds.
+
+
+class ReadCache:
+    def __init__(self):
+        self._entries = {}  # key -> (expires_at, body bytes, etag, last_modified)
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by every invalidate(); guards against storing stale results
+        self._changed_at = datetime.now(timezone.utc).replace(microsecond=0)  # Last-Modified (whole seconds)
+
+    def get(self, key, compute, ttl=None):
+        ttl = Config.CACHE_TTL if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            generation, changed_at = self._generation, self._changed_at
+        if entry and entry[0] > now:
+            return entry[1:]
+        body = json.dumps(compute(), separators=(",", ":")).encode("utf-8")
+        etag = hashlib.sha1(body).hexdigest()
+        entry = (now + ttl, body, etag, changed_at)
+        with self._lock:
+            # Don't store a result computed across an invalidation
+            if generation == self._generation:
+                self._entries[key] = entry
+        return entry[1:]
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._changed_at = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def response(self, key, compute, ttl=None):
+        """Cached JSON response honouring If-None-Match / If-Modified-Since."""
+        body, etag, last_modified = self.get(key, compute, ttl)
+        resp = Response(body, mimetype="application/json")
+        resp.set_etag(etag)
+        resp.last_modified = last_modified
+        resp.cache_control.no_cache = True  # clients may keep it but must revalidate
+        return resp.make_conditional(request)
+
+
+read_cache = ReadCache()
@@ -0,0 +1,139 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from .config import Config
+from .db import db
+from .models import Stock, StockMovement
+
+# Stock change feed for live desks. StockMovement.id is the cursor: a desk asks for
+# everything after the last id it has seen and the request is held open (long-poll)
+# until something arrives or the wait runs out. Writes in this process wake waiters
+# at once via notify(); changes committed by other worker processes are picked up
+# by re-querying every CHANGES_POLL seconds.
+#
+# Ids are allocated at insert but become visible at commit, so a lower id can show
+# up after a higher one was already delivered. The cursor therefore has two parts,
+# "<hold>:<seen>": every movement up to `hold` has been delivered, and `seen` lists
+# (as ranges) the ids above it that were. `hold` only moves past movements older
+# than CHANGES_SETTLE seconds, by which time any earlier id has committed, so the
+# window re-scanned on each poll stays a few seconds wide. Cursors come back from
+# clients, so `seen` is capped at CHANGES_MAX_SEEN ids; should more than that be
+# fresh at once, `hold` moves up past the oldest of them instead.
+
+
+def parse_cursor(raw):
+    """"<hold>[:<a>-<b>,<c>...]" -> (hold, set of seen ids); raises ValueError.
+    Ranges must be ascending, above `hold` and hold CHANGES_MAX_SEEN ids at most."""
+    hold, _, ranges = str(raw).partition(":")
+    hold = last = int(hold)
+    if hold < 0:
+        raise ValueError("negative cursor")
+    spans = []
+    for part in filter(None, ranges.split(",")):
+        lo, _, hi = part.partition("-")
+        lo, hi = int(lo), int(hi or lo)
+        if not last < lo <= hi:
+            raise ValueError("seen ranges must be ascending and above the hold")
+        spans.append((lo, hi))
+        last = hi
+    if sum(hi - lo + 1 for lo, hi in spans) > Config.CHANGES_MAX_SEEN:
+        raise ValueError("too many seen ids")
+    return hold, {i for lo, hi in spans for i in range(lo, hi + 1)}
+
+
+def format_cursor(hold, seen):
+    seen = sorted(i for i in seen if i > hold)
+    if len(seen) > Config.CHANGES_MAX_SEEN:
+        # Too many fresh movements to track: stop waiting for late ids below the
+        # oldest ones kept (only under a burst far above CHANGES_MAX_SEEN per settle)
+        hold = seen[-Config.CHANGES_MAX_SEEN - 1]
+        seen = seen[-Config.CHANGES_MAX_SEEN:]
+    ranges = []
+    for i in seen:
+        if ranges and ranges[-1][1] == i - 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    parts = [str(lo) if lo == hi else f"{lo}-{hi}" for lo, hi in ranges]
+    return f"{hold}:{','.join(parts)}" if parts else str(hold)
+
+
+def movements_after(cursor, limit):
+    """Up to `limit` movements not yet delivered past `cursor` (oldest id first).
+    Returns (movements, next cursor, more)."""
+    hold, seen = parse_cursor(cursor)
+    rows = (StockMovement.query.filter(StockMovement.id > hold)
+            .order_by(StockMovement.id).limit(limit + len(seen) + 1).all())
+    new, more = [], False
+    for m in rows:
+        if m.id in seen:
+            continue
+        if len(new) == limit:
+            more = True
+            break
+        new.append(m)
+        seen.add(m.id)
+    settled = datetime.utcnow() - timedelta(seconds=Config.CHANGES_SETTLE)
+    for m in rows:
+        if m.id not in seen or (m.timestamp is not None and m.timestamp > settled):
+            break
+        hold = m.id
+    return new, format_cursor(hold, seen), more
+
+
+class ChangeFeed:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._version = 0
+
+    def notify(self):
+        """Wake every waiting request; called by the stock engine after commit."""
+        with self._cond:
+            self._version += 1
+            self._cond.notify_all()
+
+    def latest(self):
+        """Cursor for "from now on": held at the newest settled movement, with the
+        fresher ones (already visible) marked seen."""
+        settled = datetime.utcnow() - timedelta(seconds=Config.CHANGES_SETTLE)
+        hold = (db.session.query(func.max(StockMovement.id))
+                .filter(StockMovement.timestamp <= settled).scalar() or 0)
+        fresh = db.session.query(StockMovement.id).filter(StockMovement.id > hold)
+        return format_cursor(hold, {i for (i,) in fresh})
+
+    def poll(self, since, wait):
+        """Movements not yet delivered past cursor `since`, waiting up to `wait`
+        seconds for the first one.
+
+        Returns {"cursor", "movements", "stock"} where stock holds the current units
+        of the groups that moved (absolute values, so desks cannot drift)."""
+        deadline = time.monotonic() + wait
+        while True:
+            with self._cond:
+                version = self._version
+            rows, cursor, _ = movements_after(since, Config.CHANGES_BATCH)
+            remaining = deadline - time.monotonic()
+            if rows or remaining <= 0:
+                break
+            # End the read transaction (fresh snapshot next time, connection back
+            # to the pool) before sleeping.
+            db.session.rollback()
+            with self._cond:
+                self._cond.wait_for(lambda: self._version != version, min(remaining, Config.CHANGES_POLL))
+
+        groups = sorted({m.blood_group for m in rows})
+        stock = []
+        if groups:
+            stock = [{"blood_group": bg, "units": units} for bg, units in
+                     db.session.query(Stock.blood_group, Stock.units).filter(Stock.blood_group.in_(groups))]
+        return {
+            "cursor": cursor,
+            "movements": [m.to_dict() for m in rows],
+            "stock": stock,
+        }
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,69 @@
+import gzip
+import zlib
+
+from flask import request
+
+from .config import Config
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Response compression for slow ward links. Buffered responses over
+# COMPRESS_MIN_SIZE are compressed with brotli or gzip, whichever the client
+# prefers and we have; streamed responses (exports) are gzipped chunk by chunk.
+# Bodies that are already compressed (gzip exports) are left alone.
+
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "application/x-msgpack", "text/")
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    options = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(options, key=lambda enc: accepted[enc])  # quality 0 = not acceptable
+    return best if accepted[best] else None
+
+
+def _gzip_stream(chunks):
+    z = zlib.compressobj(Config.COMPRESS_LEVEL, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def init_compression(app):
+    @app.after_request
+    def _compress(response):
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or "Content-Encoding" in response.headers
+                or not response.mimetype.startswith(COMPRESSIBLE)):
+            return response
+        encoding = _choose_encoding()
+        response.vary.add("Accept-Encoding")
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = _gzip_stream(response.response)
+            response.headers.pop("Content-Length", None)
+            encoding = "gzip"
+        else:
+            body = response.get_data()
+            if len(body) < Config.COMPRESS_MIN_SIZE:
+                return response
+            if encoding == "br":
+                body = brotli.compress(body, quality=Config.BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, Config.COMPRESS_LEVEL)
+            response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        # Same entity, different bytes: a strong ETag must not be shared across encodings
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
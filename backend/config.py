@@ -5,11 +5,68 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-key-change-me")
+    # Session tokens: required on /api, lifetime in seconds (one long shift),
+    # and how many bcrypt checks may run at once
+    API_AUTH = os.getenv("API_AUTH", "1") == "1"
+    TOKEN_TTL = int(os.getenv("TOKEN_TTL", str(12 * 3600)))
+    BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
     DB_USER = os.getenv("DB_USER", "root")
     DB_PASSWORD = os.getenv("DB_PASSWORD", "")
     DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
     DB_PORT = os.getenv("DB_PORT", "3306")
     DB_NAME = os.getenv("DB_NAME", "blood_desk")
-    SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
+    # Engine connection pool (per process). Keep WSGI_THREADS <= DB_POOL_SIZE + DB_MAX_OVERFLOW;
+    # recycle below MySQL's wait_timeout and pre-ping so idle desks never hit a dead socket.
+    ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+    }
     APP_HOST = os.getenv("APP_HOST", "127.0.0.1")
     APP_PORT = int(os.getenv("APP_PORT", "5000"))
+    # Production server (python -m backend.wsgi): request threads per process. Each
+    # open desk holds one thread in the stock change-feed long-poll.
+    WSGI_THREADS = int(os.getenv("WSGI_THREADS", "32"))
+    WSGI_CONNECTION_LIMIT = int(os.getenv("WSGI_CONNECTION_LIMIT", "200"))
+    # Donor listing pagination (keyset on Donor.id)
+    DONOR_PAGE_SIZE = int(os.getenv("DONOR_PAGE_SIZE", "100"))
+    DONOR_PAGE_MAX = int(os.getenv("DONOR_PAGE_MAX", "1000"))
+    # Stock movement history pagination (keyset on (timestamp, id))
+    MOVEMENT_PAGE_SIZE = int(os.getenv("MOVEMENT_PAGE_SIZE", "100"))
+    MOVEMENT_PAGE_MAX = int(os.getenv("MOVEMENT_PAGE_MAX", "1000"))
+    # Donor text search: auto (MySQL FULLTEXT, else in-process index), mysql, memory or like
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+    SEARCH_MAX_HITS = int(os.getenv("SEARCH_MAX_HITS", "2000"))
+    # Bulk donor import: rows per INSERT batch/transaction
+    BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+    # Stock adjustments: retries on deadlock/lock timeout, base backoff in seconds
+    STOCK_RETRIES = int(os.getenv("STOCK_RETRIES", "5"))
+    STOCK_RETRY_BACKOFF = float(os.getenv("STOCK_RETRY_BACKOFF", "0.02"))
+    # Seconds stock/analytics reads are served from the in-process cache
+    CACHE_TTL = float(os.getenv("CACHE_TTL", "5"))
+    # Stock change feed (long-poll): max hold per request, cross-process re-check
+    # interval and max movements per response, in seconds/rows; seconds after which
+    # a movement's id is assumed to have no uncommitted lower ids (see changes.py)
+    CHANGES_MAX_WAIT = float(os.getenv("CHANGES_MAX_WAIT", "25"))
+    CHANGES_POLL = float(os.getenv("CHANGES_POLL", "1"))
+    CHANGES_BATCH = int(os.getenv("CHANGES_BATCH", "500"))
+    CHANGES_SETTLE = float(os.getenv("CHANGES_SETTLE", "5"))
+    # Most ids a change cursor may list as seen above its hold (cursors are client input)
+    CHANGES_MAX_SEEN = int(os.getenv("CHANGES_MAX_SEEN", "5000"))
+    # Instrumentation: log SQL statements slower than this (ms); add Server-Timing headers
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+    # Response compression: minimum body size (bytes), gzip level, brotli quality
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+    # Desk replicas: days of stock movement history sent on a first sync
+    SYNC_MOVEMENT_DAYS = int(os.getenv("SYNC_MOVEMENT_DAYS", "90"))
+    # Movement retention (python -m backend.archive): whole months kept in
+    # stock_movements, rows moved per transaction, pause between chunks in seconds
+    ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "13"))
+    ARCHIVE_CHUNK = int(os.getenv("ARCHIVE_CHUNK", "5000"))
+    ARCHIVE_PAUSE = float(os.getenv("ARCHIVE_PAUSE", "0.05"))
@@ -0,0 +1,134 @@
+import bisect
+import logging
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import Config
+
+# Request instrumentation: per-endpoint latency histograms plus SQL statement count
+# and time per request (SQLAlchemy cursor events), a slow-query log and a /metrics
+# endpoint in Prometheus text format. With Config.SERVER_TIMING on, responses carry
+# a Server-Timing header (app and db time) for the desktop client.
+#
+# Latency is measured up to the end of the view; streamed bodies (exports) are
+# not included.
+
+slow_log = logging.getLogger("backend.slow_sql")
+
+# Histogram bucket upper bounds, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}    # (endpoint, method) -> Histogram
+        self.requests = {}   # (endpoint, method, status) -> count
+        self.sql = {}        # endpoint -> [statements, seconds]
+        self.slow_queries = 0
+
+    def record(self, endpoint, method, status, seconds, sql_count, sql_seconds):
+        with self._lock:
+            self.latency.setdefault((endpoint, method), Histogram()).observe(seconds)
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            totals = self.sql.setdefault(endpoint, [0, 0.0])
+            totals[0] += sql_count
+            totals[1] += sql_seconds
+
+    def count_slow(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        out = []
+        with self._lock:
+            out += ["# HELP http_request_duration_seconds Request latency by endpoint.",
+                    "# TYPE http_request_duration_seconds histogram"]
+            for (endpoint, method), h in sorted(self.latency.items()):
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ("+Inf",), h.counts):
+                    cumulative += n
+                    out.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                out.append(f"http_request_duration_seconds_sum{{{labels}}} {h.total:.6f}")
+                out.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+            out += ["# HELP http_requests_total Requests by endpoint and status.",
+                    "# TYPE http_requests_total counter"]
+            for (endpoint, method, status), n in sorted(self.requests.items()):
+                out.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {n}')
+            out += ["# HELP sql_statements_total SQL statements executed, by endpoint.",
+                    "# TYPE sql_statements_total counter"]
+            out += [f'sql_statements_total{{endpoint="{e}"}} {n}' for e, (n, _) in sorted(self.sql.items())]
+            out += ["# HELP sql_duration_seconds_total Time spent in SQL, by endpoint.",
+                    "# TYPE sql_duration_seconds_total counter"]
+            out += [f'sql_duration_seconds_total{{endpoint="{e}"}} {s:.6f}' for e, (_, s) in sorted(self.sql.items())]
+            out += ["# HELP sql_slow_queries_total Statements slower than SLOW_QUERY_MS.",
+                    "# TYPE sql_slow_queries_total counter",
+                    f"sql_slow_queries_total {self.slow_queries}"]
+        return "\n".join(out) + "\n"
+
+
+metrics = Metrics()
+
+
+# ---------- SQL hooks ----------
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if has_request_context() and "sql_count" in g:
+        g.sql_count += 1
+        g.sql_seconds += elapsed
+    if elapsed * 1000 >= Config.SLOW_QUERY_MS:
+        metrics.count_slow()
+        params = repr(parameters)
+        if len(params) > 500:  # executemany batches
+            params = params[:500] + "…"
+        slow_log.warning("slow query %.1f ms: %s | params=%s", elapsed * 1000, " ".join(statement.split()), params)
+
+
+# ---------- Flask hooks ----------
+
+def init_metrics(app):
+    @app.before_request
+    def _start_timer():
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_seconds = 0.0
+
+    @app.after_request
+    def _record(response):
+        if "request_start" not in g:
+            return response
+        elapsed = time.perf_counter() - g.request_start
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.record(endpoint, request.method, response.status_code, elapsed, g.sql_count, g.sql_seconds)
+        if Config.SERVER_TIMING:
+            response.headers["Server-Timing"] = (
+                f"app;dur={elapsed * 1000:.1f}, db;dur={g.sql_seconds * 1000:.1f};desc=\"{g.sql_count} queries\"")
+        return response
+
+    @app.get("/metrics")
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -1,12 +1,24 @@
 from datetime import datetime, date
 from .db import db
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, DDL, event
 from sqlalchemy.orm import validates
 
 # Short IDs via auto-increment (INT). No long UUIDs.
 # Blood groups limited to standard set.
 BLOOD_GROUPS = ("O+", "O-", "A+", "A-", "B+", "B-", "AB+", "AB-")
 
+def compatible_donor_groups(recipient):
+    """Groups whose red cells a `recipient` can receive (ABO antigens subset, Rh- gives to Rh+)."""
+    r_abo, r_rh = recipient[:-1], recipient[-1]
+    return tuple(
+        g for g in BLOOD_GROUPS
+        if set(g[:-1].replace("O", "")) <= set(r_abo.replace("O", "")) and (g[-1] == "-" or r_rh == "+")
+    )
+
+def normalize_area(area):
+    """Case/whitespace-insensitive key for exact, indexable area matching."""
+    return " ".join(area.lower().split()) if area else None
+
 class User(db.Model):
     __tablename__ = "users"
     id = db.Column(db.Integer, primary_key=True)
@@ -23,6 +35,13 @@ class User(db.Model):
 
 class Donor(db.Model):
     __tablename__ = "donors"
+    __table_args__ = (
+        # Emergency call-outs: group + active, walked in last-donation order
+        db.Index("ix_donors_eligibility", "blood_group", "active", "last_donation_date"),
+        db.Index("ix_donors_area_eligibility", "area_key", "blood_group", "active", "last_donation_date"),
+        # Desk replicas sync on (updated_at, id)
+        db.Index("ix_donors_sync", "updated_at", "id"),
+    )
     id = db.Column(db.Integer, primary_key=True)  # short numeric ID
     name = db.Column(db.String(120), nullable=False)
     nic = db.Column(db.String(32), nullable=True)
@@ -30,6 +49,7 @@ class Donor(db.Model):
     email = db.Column(db.String(120), nullable=True)
     address = db.Column(db.String(255), nullable=True)
     area = db.Column(db.String(120), nullable=True)
+    area_key = db.Column(db.String(120), nullable=True)  # normalize_area(area), kept in sync below
     blood_group = db.Column(db.String(4), nullable=False, index=True)
     age = db.Column(db.Integer, nullable=True)
     last_donation_date = db.Column(db.Date, nullable=True)
@@ -43,6 +63,11 @@ class Donor(db.Model):
         assert value in BLOOD_GROUPS, "Invalid blood group"
         return value
 
+    @validates("area")
+    def validate_area(self, key, value):
+        self.area_key = normalize_area(value)
+        return value
+
     def to_dict(self):
         return {
             "id": self.id, "name": self.name, "nic": self.nic, "phone": self.phone,
@@ -53,6 +78,19 @@ class Donor(db.Model):
             "created_at": self.created_at.isoformat(), "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
 
+# MySQL-only FULLTEXT (ngram) index behind /api/donors/search; other databases
+# fall back to the in-process index in search.py.
+event.listen(Donor.__table__, "after_create", DDL(
+    "ALTER TABLE donors ADD FULLTEXT INDEX ft_donors_search "
+    "(name, phone, email, address, area) WITH PARSER ngram"
+).execute_if(dialect="mysql"))
+
+class DonorTombstone(db.Model):
+    """Deleted donor ids, so desk replicas can drop them on their next sync."""
+    __tablename__ = "donor_tombstones"
+    donor_id = db.Column(db.Integer, primary_key=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
 class Stock(db.Model):
     __tablename__ = "stock"
     id = db.Column(db.Integer, primary_key=True)
@@ -64,8 +102,13 @@ class Stock(db.Model):
 
 class StockMovement(db.Model):
     __tablename__ = "stock_movements"
+    __table_args__ = (
+        # History/audit reads: newest first, optionally within a group and time range
+        db.Index("ix_movements_time", "timestamp", "id"),
+        db.Index("ix_movements_group_time", "blood_group", "timestamp", "id"),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    blood_group = db.Column(db.String(4), nullable=False, index=True)
+    blood_group = db.Column(db.String(4), nullable=False)
     delta = db.Column(db.Integer, nullable=False)  # + received, - issued/discarded
     reason = db.Column(db.String(50), nullable=False)  # donation/issue/discard/adjust
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
@@ -76,3 +119,34 @@ class StockMovement(db.Model):
             "id": self.id, "blood_group": self.blood_group, "delta": self.delta,
             "reason": self.reason, "timestamp": self.timestamp.isoformat(), "user_id": self.user_id
         }
+
+class StockMovementArchive(db.Model):
+    """Movements older than the retention window, moved here by backend/archive.py
+    with their original ids. Same columns as stock_movements."""
+    __tablename__ = "stock_movements_archive"
+    __table_args__ = (
+        db.Index("ix_movements_archive_time", "timestamp", "id"),
+        db.Index("ix_movements_archive_group_time", "blood_group", "timestamp", "id"),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    blood_group = db.Column(db.String(4), nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(50), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+
+class StockDailyRollup(db.Model):
+    """Per-day, per-group movement totals, maintained by adjust_stock (see rollup.py)."""
+    __tablename__ = "stock_daily_rollup"
+    day = db.Column(db.Date, primary_key=True)
+    blood_group = db.Column(db.String(4), primary_key=True)
+    received = db.Column(db.Integer, nullable=False, default=0)   # reason=donation
+    issued = db.Column(db.Integer, nullable=False, default=0)     # reason=issue, as positive units
+    discarded = db.Column(db.Integer, nullable=False, default=0)  # reason=discard, as positive units
+    adjusted = db.Column(db.Integer, nullable=False, default=0)   # any other reason, signed net
+
+    def to_dict(self):
+        return {
+            "day": self.day.isoformat(), "blood_group": self.blood_group, "received": self.received,
+            "issued": self.issued, "discarded": self.discarded, "adjusted": self.adjusted
+        }
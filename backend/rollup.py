@@ -0,0 +1,84 @@
+from sqlalchemy import case, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .db import db
+from .models import StockMovement, StockMovementArchive, StockDailyRollup
+
+# Daily stock rollup: one row per (day, blood_group). adjust_stock bumps the row in
+# the same transaction as the movement insert; `python -m backend.rollup` rebuilds
+# the whole table from stock_movements.
+
+REASON_COLUMNS = {"donation": "received", "issue": "issued", "discard": "discarded"}
+COLUMNS = ("received", "issued", "discarded", "adjusted")
+
+
+def rollup_values(delta, reason):
+    """Counter increments for one movement: issues/discards are stored as positive units."""
+    col = REASON_COLUMNS.get(reason, "adjusted")
+    amount = -delta if col in ("issued", "discarded") else delta
+    values = dict.fromkeys(COLUMNS, 0)
+    values[col] = amount
+    return values
+
+
+def record_movement(day, blood_group, delta, reason):
+    """Atomically add one movement to its rollup row (insert or increment), in the caller's transaction."""
+    record_totals(day, blood_group, rollup_values(delta, reason))
+
+
+def record_totals(day, blood_group, values):
+    table = StockDailyRollup.__table__
+    row = {"day": day, "blood_group": blood_group, **values}
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(table).values(row)
+        stmt = stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in COLUMNS})
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(table).values(row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "blood_group"],
+            set_={c: table.c[c] + stmt.excluded[c] for c in COLUMNS},
+        )
+    else:
+        existing = db.session.get(StockDailyRollup, (day, blood_group))
+        if existing is None:
+            db.session.add(StockDailyRollup(**row))
+        else:
+            for c in COLUMNS:
+                setattr(existing, c, getattr(existing, c) + values[c])
+        return
+    db.session.execute(stmt)
+
+
+def rebuild():
+    """Recompute every rollup row from stock_movements (and its archive) in one INSERT ... SELECT."""
+    m = db.union_all(*[db.select(t.timestamp, t.blood_group, t.delta, t.reason)
+                       for t in (StockMovement, StockMovementArchive)]).subquery().c
+    day = func.date(m.timestamp)
+
+    def total(col):
+        reasons = [r for r, c in REASON_COLUMNS.items() if c == col]
+        cond = m.reason.in_(reasons) if reasons else m.reason.notin_(list(REASON_COLUMNS))
+        sign = -1 if col in ("issued", "discarded") else 1
+        return func.coalesce(func.sum(case((cond, m.delta * sign), else_=0)), 0)
+
+    select = (db.select(day, m.blood_group, *[total(c) for c in COLUMNS])
+              .group_by(day, m.blood_group))
+    db.session.execute(db.delete(StockDailyRollup))
+    db.session.execute(StockDailyRollup.__table__.insert().from_select(["day", "blood_group", *COLUMNS], select))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(StockDailyRollup).scalar()
+
+
+def main():
+    from .app import create_app
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        rows = rebuild()
+        print(f"Rebuilt stock_daily_rollup: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,26 @@
-from flask import Blueprint, request, send_file
-from sqlalchemy import and_, or_, func
-from datetime import datetime, date
+from flask import Blueprint, request, send_file, Response, stream_with_context
+from sqlalchemy import or_, func
+from datetime import datetime, date, timedelta
+import heapq
+import itertools
 from io import StringIO
+import io
 import csv
+import json
+import zlib
 
+from .config import Config
 from .db import db
-from .models import Donor, Stock, StockMovement, BLOOD_GROUPS
+from .models import Donor, DonorTombstone, Stock, StockMovement, StockMovementArchive, StockDailyRollup, BLOOD_GROUPS, compatible_donor_groups, normalize_area
+from .search import donor_search
+from .cache import read_cache
+from .changes import change_feed, parse_cursor, movements_after
+from .auth import require_token
+from .serialize import DONOR_FIELDS, MOVEMENT_FIELDS, projection, columns_of, listing, negotiated_response
+from . import stock as stock_engine
 
 api_bp = Blueprint("api", __name__)
+api_bp.before_request(require_token)  # every /api call carries a session token
 
 # ---------- Donors ----------
 
@@ -30,15 +43,55 @@ def create_donor():
         )
         db.session.add(donor)
         db.session.commit()
+        donor_search.add(donor)
         return {"donor": donor.to_dict()}, 201
     except Exception as e:
         db.session.rollback()
         return {"error": str(e)}, 400
 
+def _page_size():
+    size = request.args.get("limit", default=Config.DONOR_PAGE_SIZE, type=int)
+    return max(1, min(size, Config.DONOR_PAGE_MAX))
+
+def _donor_page(query, fields, shape, **extra):
+    """Keyset page over Donor.id (newest first). `cursor` is the last id already seen.
+    Rows are column tuples (see serialize.py); fields[0] is always id."""
+    cursor = request.args.get("cursor", type=int)
+    size = _page_size()
+    if cursor is not None:
+        query = query.filter(Donor.id < cursor)
+    # Fetch one extra row to know whether another page exists
+    rows = query.with_entities(*columns_of(Donor, fields)).order_by(Donor.id.desc()).limit(size + 1).all()
+    next_cursor = rows[size - 1][0] if len(rows) > size else None
+    return listing("donors", fields, shape, rows[:size], next_cursor=next_cursor, **extra)
+
+def _ranked_page(query, ids, fields, shape, **extra):
+    """Page over a ranked id list from the search index. `cursor` is a position in that list."""
+    pos = request.args.get("cursor", default=0, type=int)
+    if pos < 0:
+        return {"error": "cursor must be non-negative"}, 400
+    size = _page_size()
+    query = query.with_entities(*columns_of(Donor, fields))
+    donors = []
+    while pos < len(ids) and len(donors) < size:
+        chunk = ids[pos:pos + size]
+        rows = {r[0]: r for r in query.filter(Donor.id.in_(chunk)).all()}
+        for did in chunk:
+            pos += 1
+            if did in rows:
+                donors.append(rows[did])
+                if len(donors) == size:
+                    break
+    next_cursor = pos if pos < len(ids) else None
+    return listing("donors", fields, shape, donors, next_cursor=next_cursor, **extra)
+
 @api_bp.get("/donors")
 def list_donors():
-    donors = Donor.query.order_by(Donor.id.desc()).limit(500).all()
-    return {"donors": [d.to_dict() for d in donors]}
+    try:
+        fields, shape = projection(DONOR_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return _donor_page(Donor.query, fields, shape)
 
 @api_bp.get("/donors/<int:donor_id>")
 def get_donor(donor_id):
@@ -56,6 +109,7 @@ def update_donor(donor_id):
         if "last_donation_date" in data:
             d.last_donation_date = datetime.fromisoformat(data["last_donation_date"]).date() if data["last_donation_date"] else None
         db.session.commit()
+        donor_search.add(d)
         return {"donor": d.to_dict()}
     except Exception as e:
         db.session.rollback()
@@ -65,7 +119,9 @@ def update_donor(donor_id):
 def delete_donor(donor_id):
     d = Donor.query.get_or_404(donor_id)
     db.session.delete(d)
+    db.session.merge(DonorTombstone(donor_id=donor_id, deleted_at=datetime.utcnow()))
     db.session.commit()
+    donor_search.remove(donor_id)
     return {"ok": True}
 
 @api_bp.get("/donors/search")
@@ -77,9 +133,13 @@ def search_donors():
     age_max = request.args.get("age_max", type=int)
     last_after = request.args.get("last_after")
     last_before = request.args.get("last_before")
+    try:
+        fields, shape = projection(DONOR_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}, 400
 
     query = Donor.query
-    if q:
+    if q and donor_search.backend() == "like":
         like = f"%{q}%"
         query = query.filter(or_(Donor.name.like(like), Donor.phone.like(like), Donor.email.like(like), Donor.address.like(like), Donor.area.like(like)))
     if bg:
@@ -95,13 +155,160 @@ def search_donors():
     if last_before:
         query = query.filter(Donor.last_donation_date <= datetime.fromisoformat(last_before).date())
 
-    donors = query.order_by(Donor.id.desc()).limit(500).all()
-    return {"donors": [d.to_dict() for d in donors]}
+    # matching: how `q` was applied, so clients know whether they may refine results locally
+    backend = donor_search.backend()
+    matching = {"memory": "prefix", "mysql": "fulltext", "like": "substring"}.get(backend, backend)
+    if q and backend != "like":
+        # The filters go into the ranking, before SEARCH_MAX_HITS is applied
+        filtered = any(v for v in (bg, area, last_after, last_before)) or age_min is not None or age_max is not None
+        ranked, truncated = donor_search.ranked_ids(q, query if filtered else None)
+        # truncated: more than SEARCH_MAX_HITS matched; refine the query to see the rest
+        return _ranked_page(query, ranked, fields, shape, truncated=truncated, matching=matching)
+    return _donor_page(query, fields, shape, matching=matching)
+
+MAX_INTERVAL_DAYS = 3650  # also keeps date.today() - interval within the date range
+
+@api_bp.get("/donors/eligible")
+def eligible_donors():
+    """Active donors who can give to `blood_group` now, longest since last donation first."""
+    bg = request.args.get("blood_group")
+    interval = request.args.get("interval_days", default=56, type=int)
+    area = request.args.get("area", "").strip()
+    compatible = request.args.get("compatible", default=1, type=int)
+    limit = _page_size()
+
+    if bg not in BLOOD_GROUPS:
+        return {"error": "Invalid blood group"}, 400
+    if not 0 <= interval <= MAX_INTERVAL_DAYS:
+        return {"error": f"interval_days must be between 0 and {MAX_INTERVAL_DAYS}"}, 400
+
+    cutoff = date.today() - timedelta(days=interval)
+    groups = compatible_donor_groups(bg) if compatible else (bg,)
+    # One query per group, each an index range scan already in last_donation_date order
+    # (never-donated first); merging them here avoids a filesort over an IN list.
+    per_group = []
+    for g in groups:
+        # `active == True`, not .is_(True): MySQL only seeks the index on `active = 1`, not `IS true`
+        query = Donor.query.filter(
+            Donor.blood_group == g, Donor.active == True,
+            or_(Donor.last_donation_date.is_(None), Donor.last_donation_date <= cutoff),
+        )
+        if area:
+            query = query.filter(Donor.area_key == normalize_area(area))
+        per_group.append(query.order_by(Donor.last_donation_date.asc(), Donor.id.asc()).limit(limit).all())
+
+    def order(d):
+        return (d.last_donation_date is not None, d.last_donation_date or date.min, d.id)
+
+    donors = []
+    for d in heapq.merge(*per_group, key=order):
+        row = d.to_dict()
+        row["eligible_since"] = (d.last_donation_date + timedelta(days=interval)).isoformat() if d.last_donation_date else None
+        donors.append(row)
+        if len(donors) == limit:
+            break
+    return {"donors": donors, "groups": list(groups), "cutoff": cutoff.isoformat()}
+
+# ---------- Bulk import ----------
+
+BULK_FIELDS = ("name", "nic", "phone", "email", "address", "area", "blood_group", "age", "last_donation_date", "notes", "active")
+BULK_MAX_ERRORS = 1000  # per-row errors reported back; the counts are always exact
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+def _bulk_source(fmt):
+    """(row_number, dict) pairs read straight off the request body."""
+    text = io.TextIOWrapper(request.stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for n, row in enumerate(csv.DictReader(text), 1):
+            yield n, row
+        return
+    for n, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = e
+        yield n, row
+
+def _validate_bulk(batch, now):
+    """Split a batch into insertable row dicts and (row_number, error) pairs."""
+    rows, errors = [], []
+    for n, raw in batch:
+        if not isinstance(raw, dict):
+            errors.append((n, f"Invalid JSON: {raw}" if isinstance(raw, Exception) else "Row must be an object"))
+            continue
+        vals = {f: (raw.get(f).strip() if isinstance(raw.get(f), str) else raw.get(f)) for f in BULK_FIELDS}
+        vals = {f: (None if v == "" else v) for f, v in vals.items()}
+        try:
+            if not vals["name"]:
+                raise ValueError("name is required")
+            if vals["blood_group"] not in BLOOD_GROUPS:
+                raise ValueError("Invalid blood group")
+            vals["age"] = int(vals["age"]) if vals["age"] is not None else None
+            last = vals["last_donation_date"]
+            vals["last_donation_date"] = datetime.fromisoformat(str(last)).date() if last else None
+            active = vals["active"]
+            vals["active"] = True if active is None else (active if isinstance(active, bool) else str(active).lower() in TRUE_VALUES)
+        except (TypeError, ValueError) as e:
+            errors.append((n, str(e)))
+            continue
+        vals["area_key"] = normalize_area(vals["area"])
+        vals["created_at"] = vals["updated_at"] = now
+        rows.append((n, vals))
+    return rows, errors
+
+@api_bp.post("/donors/bulk")
+def bulk_import_donors():
+    """Stream-import donors from a CSV (text/csv) or NDJSON (application/x-ndjson) body.
+    Valid rows go in with one executemany per chunk, each chunk its own transaction."""
+    fmt = "ndjson" if "json" in (request.mimetype or "") else "csv"
+    chunk_size = request.args.get("chunk_size", default=Config.BULK_CHUNK_SIZE, type=int)
+    chunk_size = max(1, min(chunk_size, 10000))
+
+    inserted, failed, errors = 0, 0, []
+
+    def report(errs):
+        nonlocal failed
+        failed += len(errs)
+        room = BULK_MAX_ERRORS - len(errors)
+        errors.extend({"row": n, "error": msg} for n, msg in errs[:max(room, 0)])
+
+    def flush(batch):
+        nonlocal inserted
+        rows, errs = _validate_bulk(batch, datetime.utcnow())
+        report(errs)
+        if not rows:
+            return
+        try:
+            db.session.execute(Donor.__table__.insert(), [vals for _, vals in rows])
+            db.session.commit()
+            inserted += len(rows)
+        except Exception as e:
+            db.session.rollback()
+            report([(n, f"Insert failed: {e}") for n, _ in rows])
+
+    batch = []
+    for item in _bulk_source(fmt):
+        batch.append(item)
+        if len(batch) == chunk_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    if inserted:
+        donor_search.reset()  # core inserts bypass the per-donor index hooks
+    return {"inserted": inserted, "failed": failed, "errors": errors,
+            "errors_truncated": failed > len(errors)}
 
 # ---------- Stock ----------
 
 @api_bp.get("/stock")
 def get_stock():
+    return read_cache.response("stock", _stock_listing)
+
+def _stock_listing():
     items = Stock.query.order_by(Stock.blood_group).all()
     # ensure all groups exist
     existing = {s.blood_group for s in items}
@@ -126,72 +333,291 @@ def adjust_stock():
     if delta == 0:
         return {"error": "Delta must be non-zero"}, 400
 
-    s = Stock.query.filter_by(blood_group=bg).first()
-    if not s:
-        s = Stock(blood_group=bg, units=0)
-        db.session.add(s)
-        db.session.flush()
-
-    new_units = s.units + delta
-    if new_units < 0:
+    try:
+        stock, movement = stock_engine.adjust(bg, delta, reason)
+    except stock_engine.InsufficientStock:
         return {"error": "Not enough units"}, 400
+    return {"stock": stock, "movement": movement}
 
-    s.units = new_units
-    mv = StockMovement(blood_group=bg, delta=delta, reason=reason, user_id=None)
-    db.session.add(mv)
-    db.session.commit()
-    return {"stock": s.to_dict(), "movement": mv.to_dict()}
+STOCK_BATCH_MAX = 500
+
+@api_bp.post("/stock/batch")
+def adjust_stock_batch():
+    """Apply several {blood_group, delta, reason} lines all-or-nothing."""
+    data = request.get_json() or {}
+    raw = data.get("lines")
+    if not isinstance(raw, list) or not raw:
+        return {"error": "lines must be a non-empty list"}, 400
+    if len(raw) > STOCK_BATCH_MAX:
+        return {"error": f"At most {STOCK_BATCH_MAX} lines per batch"}, 400
+
+    lines = []
+    for i, line in enumerate(raw):
+        try:
+            bg, delta = line.get("blood_group"), int(line.get("delta", 0))
+            reason = line.get("reason") or "adjust"
+        except (AttributeError, TypeError, ValueError):
+            return {"error": "Invalid line", "line": i}, 400
+        if bg not in BLOOD_GROUPS:
+            return {"error": "Invalid blood group", "line": i}, 400
+        if delta == 0:
+            return {"error": "Delta must be non-zero", "line": i}, 400
+        lines.append((bg, delta, reason))
+
+    try:
+        applied = stock_engine.adjust_batch(lines)
+    except stock_engine.InsufficientStock as e:
+        return {"error": "Not enough units", "blood_group": e.blood_group}, 400
+    # Return the whole table so the desk can redraw without a second round-trip
+    items = Stock.query.order_by(Stock.blood_group).all()
+    return {"applied": applied, "stock": [s.to_dict() for s in items]}
+
+@api_bp.get("/stock/changes")
+def stock_changes():
+    """Long-poll change feed. Without `since`, returns the current cursor at once;
+    with it, waits up to `wait` seconds for movements past that cursor."""
+    since = request.args.get("since")
+    if not since:
+        return {"cursor": change_feed.latest(), "movements": [], "stock": []}
+    try:
+        parse_cursor(since)
+    except ValueError:
+        return {"error": "Invalid change cursor"}, 400
+    wait = max(0.0, min(request.args.get("wait", default=Config.CHANGES_MAX_WAIT, type=float), Config.CHANGES_MAX_WAIT))
+    return change_feed.poll(since, wait)
+
+def _parse_when(raw):
+    """ISO date or datetime query value; a bare date means its midnight."""
+    return datetime.fromisoformat(raw) if raw else None
 
 @api_bp.get("/stock/movements")
 def stock_movements():
-    limit = request.args.get("limit", default=100, type=int)
-    items = StockMovement.query.order_by(StockMovement.id.desc()).limit(limit).all()
-    return {"movements": [m.to_dict() for m in items]}
+    """Movement history, newest first, as keyset pages on (timestamp, id).
+
+    Filters: from (inclusive) / to (exclusive) as ISO dates or datetimes,
+    blood_group, reason. Pass back `next_cursor` as `cursor` for the next page."""
+    size = max(1, min(request.args.get("limit", default=Config.MOVEMENT_PAGE_SIZE, type=int), Config.MOVEMENT_PAGE_MAX))
+    try:
+        fields, shape = projection(MOVEMENT_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        start, end = _parse_when(request.args.get("from")), _parse_when(request.args.get("to"))
+        cursor = request.args.get("cursor")
+        if cursor:
+            ts, _, last_id = cursor.partition("~")
+            cursor = datetime.fromisoformat(ts), int(last_id)
+    except ValueError:
+        return {"error": "from/to must be ISO dates and cursor a next_cursor value"}, 400
+    bg = request.args.get("blood_group")
+    if bg and bg not in BLOOD_GROUPS:
+        return {"error": "Invalid blood group"}, 400
+
+    def page(m):
+        query = db.session.query(m.timestamp, *columns_of(m, fields))
+        if bg:
+            query = query.filter(m.blood_group == bg)
+        if request.args.get("reason"):
+            query = query.filter(m.reason == request.args["reason"])
+        if start is not None:
+            query = query.filter(m.timestamp >= start)
+        if end is not None:
+            query = query.filter(m.timestamp < end)
+        if cursor:
+            ts, last_id = cursor
+            # The plain `timestamp <= ts` keeps this one range scan in index order; the
+            # bare OR gets planned as two index lookups plus a sort (seen on SQLite)
+            query = query.filter(m.timestamp <= ts, or_(m.timestamp < ts, m.id < last_id))
+        # One extra row tells whether another page exists
+        return query.order_by(m.timestamp.desc(), m.id.desc()).limit(size + 1).all()
+
+    # Recent rows and archived ones (backend/archive.py), each an index range scan,
+    # merged newest first
+    merged = heapq.merge(page(StockMovement), page(StockMovementArchive), key=lambda r: (r[0], r[1]), reverse=True)
+    rows = list(itertools.islice(merged, size + 1))
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = f"{rows[-1][0].isoformat()}~{rows[-1][1]}"
+    return listing("movements", fields, shape, [r[1:] for r in rows], next_cursor=next_cursor)
+
+# ---------- Sync ----------
+
+SYNC_SETTLE = timedelta(seconds=2)  # skip rows this fresh: their transaction may not be visible everywhere yet
+
+def _parse_sync_cursor(raw):
+    """"<donor updated_at>~<donor id>~<movement cursor>" -> (datetime|None, int, str|None).
+    The timestamp is empty until a donor has been synced; the movement part is a
+    change-feed cursor (see changes.py)."""
+    if not raw:
+        return None, 0, None
+    ts, donor_id, movements = raw.split("~")
+    parse_cursor(movements)  # validate
+    since = datetime.fromisoformat(ts) if ts else None
+    if since == datetime.min:  # written by older servers for an empty donor table
+        since = None
+    return since, int(donor_id), movements
+
+@api_bp.get("/sync")
+def sync():
+    """Incremental feed for desk replicas: donors changed since the cursor (keyset on
+    (updated_at, id)), tombstones for deleted donors, stock movements not yet
+    delivered, and the full stock table. Call again with `cursor` while `more` is
+    true; keep the last cursor for the next sync."""
+    try:
+        since, after_id, movement_cursor = _parse_sync_cursor(request.args.get("since"))
+    except ValueError:
+        return {"error": "Invalid sync cursor"}, 400
+    start = since
+    size = _page_size()
+    upto = datetime.utcnow() - SYNC_SETTLE
+
+    query = db.session.query(Donor.updated_at, *columns_of(Donor, DONOR_FIELDS)).filter(Donor.updated_at <= upto)
+    if since is not None:
+        # `updated_at >= since` keeps one ordered range scan (see stock_movements)
+        query = query.filter(Donor.updated_at >= since, or_(Donor.updated_at > since, Donor.id > after_id))
+    rows = query.order_by(Donor.updated_at, Donor.id).limit(size + 1).all()
+    more = len(rows) > size
+    rows = rows[:size]
+    if rows:
+        since, after_id = rows[-1][0], rows[-1][1]
+
+    # Without a donor high-water mark the replica holds no donors, so nothing to delete
+    deleted = []
+    if start is not None:
+        deleted = [t.donor_id for t in DonorTombstone.query.filter(DonorTombstone.deleted_at > start - SYNC_SETTLE)]
+
+    if movement_cursor is None:
+        # First sync: only recent history is mirrored
+        first = (db.session.query(func.min(StockMovement.id))
+                 .filter(StockMovement.timestamp >= datetime.utcnow() - timedelta(days=Config.SYNC_MOVEMENT_DAYS)).scalar())
+        movement_cursor = str(first - 1) if first else change_feed.latest()
+    # Same cursor as the change feed: movements whose lower id commits late are not skipped
+    movements, movement_cursor, more_movements = movements_after(movement_cursor, size)
+    more = more or more_movements
+
+    cursor = f"{since.isoformat() if since else ''}~{after_id}~{movement_cursor}"
+    return negotiated_response({
+        "donor_fields": list(DONOR_FIELDS),
+        "donors": [tuple(r[1:]) for r in rows],
+        "deleted": deleted,
+        "movement_fields": list(MOVEMENT_FIELDS),
+        "movements": [tuple(getattr(m, f) for f in MOVEMENT_FIELDS) for m in movements],
+        "stock": [s.to_dict() for s in Stock.query.order_by(Stock.blood_group)],
+        "cursor": cursor,
+        "more": more,
+    })
 
 # ---------- Analytics ----------
 
 @api_bp.get("/analytics/summary")
 def analytics_summary():
+    last_days = max(1, min(request.args.get("days", default=30, type=int), 3660))
+    return read_cache.response(("analytics", last_days), lambda: _analytics(last_days))
+
+def _analytics(last_days):
     # Total units by group
     stock = db.session.query(Stock.blood_group, Stock.units).all()
-    # Donations vs issues (approx via movements + delta sign)
-    last_days = int(request.args.get("days", 30))
-    since = datetime.utcnow() - func.interval(last_days, 'DAY') if False else None  # portable: filter manually
-    # We'll just take last N movements
-    movements = StockMovement.query.order_by(StockMovement.id.desc()).limit(300).all()
-
-    donations = {}
-    issues = {}
-    for m in movements:
-        day = m.timestamp.date().isoformat()
-        if m.delta >= 0:
-            donations[day] = donations.get(day, 0) + m.delta
-        else:
-            issues[day] = issues.get(day, 0) + (-m.delta)
+    # Daily totals for the last `days` days (today included): one range scan over
+    # stock_daily_rollup, at most days x 8 rows.
+    since = datetime.utcnow().date() - timedelta(days=last_days - 1)
+    r = StockDailyRollup
+    rows = (db.session.query(r.day, func.sum(r.received), func.sum(r.issued), func.sum(r.discarded), func.sum(r.adjusted))
+            .filter(r.day >= since).group_by(r.day).order_by(r.day).all())
+
+    donations, issues, discards, adjustments = {}, {}, {}, {}
+    for day, received, issued, discarded, adjusted in rows:
+        day = day.isoformat()
+        donations[day] = int(received or 0)
+        issues[day] = int(issued or 0) + int(discarded or 0)
+        discards[day] = int(discarded or 0)
+        adjustments[day] = int(adjusted or 0)
 
     low = [s.blood_group for s in Stock.query.filter(Stock.units < 5).all()]
 
     return {
         "stock": [{"blood_group": bg, "units": units} for bg, units in stock],
+        "days": last_days,
         "donations": donations,
         "issues": issues,
+        "discards": discards,
+        "adjustments": adjustments,
         "low_stock": low,
     }
 
 # ---------- Exports ----------
 
-@api_bp.get("/export/donors.csv")
-def export_donors_csv():
-    donors = Donor.query.order_by(Donor.id.asc()).all()
+EXPORT_BATCH = 1000  # rows per DB fetch and per response chunk
+
+DONOR_EXPORT_COLUMNS = ["id","name","nic","phone","email","address","area","blood_group","age","last_donation_date","active","created_at"]
+MOVEMENT_EXPORT_COLUMNS = ["id","blood_group","delta","reason","timestamp","user_id"]
+
+def _export_rows(models, columns):
+    # Column tuples over a server-side cursor: no ORM entities, no identity map
+    for model in models:
+        cols = [getattr(model, c) for c in columns]
+        yield from db.session.query(*cols).order_by(model.id.asc()).yield_per(EXPORT_BATCH)
+
+def _csv_value(v):
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return int(v)
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    return v
+
+def _json_default(v):
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(v).__name__}")
+
+def _csv_chunks(columns, rows):
     si = StringIO()
     cw = csv.writer(si)
-    cw.writerow(["id","name","nic","phone","email","address","area","blood_group","age","last_donation_date","active","created_at"])
-    for d in donors:
-        cw.writerow([d.id,d.name,d.nic,d.phone,d.email,d.address,d.area,d.blood_group,d.age,
-                     d.last_donation_date.isoformat() if d.last_donation_date else "",
-                     int(d.active), d.created_at.isoformat()])
-    si.seek(0)
-    return si.getvalue(), 200, {
-        "Content-Type": "text/csv",
-        "Content-Disposition": "attachment; filename=donors.csv"
-    }
+    cw.writerow(columns)
+    for i, row in enumerate(rows, 1):
+        cw.writerow([_csv_value(v) for v in row])
+        if i % EXPORT_BATCH == 0:
+            yield si.getvalue()
+            si.seek(0)
+            si.truncate(0)
+    yield si.getvalue()
+
+def _ndjson_chunks(columns, rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, row)), default=_json_default))
+        if len(lines) == EXPORT_BATCH:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def _gzip_chunks(chunks):
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = z.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield z.flush()
+
+EXPORTS = {
+    "donors": ((Donor,), DONOR_EXPORT_COLUMNS),
+    "movements": ((StockMovementArchive, StockMovement), MOVEMENT_EXPORT_COLUMNS),  # archived (older) rows first
+}
+
+@api_bp.get("/export/<any(donors, movements):kind>.<any(csv, ndjson):fmt>")
+def export_table(kind, fmt):
+    """Stream a whole table as CSV or NDJSON in constant memory; ?gzip=1 compresses it."""
+    models, columns = EXPORTS[kind]
+    rows = _export_rows(models, columns)
+    chunks = _csv_chunks(columns, rows) if fmt == "csv" else _ndjson_chunks(columns, rows)
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = f"{kind}.{fmt}"
+    if request.args.get("gzip", default=0, type=int):
+        chunks = _gzip_chunks(chunks)
+        mimetype = "application/gzip"
+        filename += ".gz"
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
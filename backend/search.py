@@ -0,0 +1,242 @@
+import re
+import threading
+
+from sqlalchemy.dialects.mysql import match
+
+from .config import Config
+from .db import db
+from .models import Donor
+
+# Donor text search. On MySQL the FULLTEXT (ngram) index on donors does the work;
+# elsewhere an in-process inverted index with prefix lookup is built on first use
+# and kept in sync by the donor routes (add/remove after commit).
+
+SEARCH_COLUMNS = ("name", "phone", "email", "address", "area")
+# Ranking weight per column: a hit in the name beats a hit in the address.
+FIELD_WEIGHTS = {"name": 4, "phone": 3, "email": 3, "area": 2, "address": 1}
+MIN_PREFIX = 2  # shorter terms only match whole tokens
+MAX_PREFIX = 6  # longer terms are verified against the donor's tokens
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _field_tokens(field, value):
+    tokens = tokenize(value)
+    if field == "phone":
+        # "077-123 4567" is also searchable as "0771234567"
+        digits = "".join(ch for ch in value if ch.isdigit())
+        if digits:
+            tokens.append(digits)
+    return tokens
+
+
+class MemoryIndex:
+    """Edge n-gram inverted index. Every token prefix (MIN_PREFIX..MAX_PREFIX chars)
+    maps to {weight: set(donor_ids)}, so a prefix lookup is a dict access and ranking
+    works on whole weight tiers with set operations instead of per-donor scoring."""
+
+    def __init__(self):
+        self._prefixes = {}        # prefix -> {weight: set(donor_id)}
+        self._exact = {}           # whole token -> {weight: set(donor_id)}
+        self._doc_tokens = {}      # donor_id -> {token: weight}
+        self._long_tokens = {}     # MAX_PREFIX-char prefix -> tokens longer than that
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_tokens)
+
+    def add(self, donor_id, fields):
+        """Index (or re-index) one donor. `fields` maps column name -> value."""
+        weights = {}
+        for field, value in fields.items():
+            if not value:
+                continue
+            w = FIELD_WEIGHTS.get(field, 1)
+            for tok in _field_tokens(field, str(value)):
+                if weights.get(tok, 0) < w:
+                    weights[tok] = w
+        with self._lock:
+            self._remove(donor_id)
+            if not weights:
+                return
+            self._doc_tokens[donor_id] = weights
+            for key, w in weights.items():
+                if key not in self._exact and len(key) > MAX_PREFIX:
+                    self._long_tokens.setdefault(key[:MAX_PREFIX], set()).add(key)
+                self._exact.setdefault(key, {}).setdefault(w, set()).add(donor_id)
+            for key, w in self._prefix_keys(weights).items():
+                self._prefixes.setdefault(key, {}).setdefault(w, set()).add(donor_id)
+
+    def remove(self, donor_id):
+        with self._lock:
+            self._remove(donor_id)
+
+    def _remove(self, donor_id):
+        weights = self._doc_tokens.pop(donor_id, None)
+        if not weights:
+            return
+        for key, w in weights.items():
+            self._discard(self._exact, key, w, donor_id)
+            if key not in self._exact and len(key) > MAX_PREFIX:
+                self._discard(self._long_tokens, key[:MAX_PREFIX], None, key)
+        for key, w in self._prefix_keys(weights).items():
+            self._discard(self._prefixes, key, w, donor_id)
+
+    @staticmethod
+    def _prefix_keys(weights):
+        """Best weight per prefix across one donor's tokens."""
+        out = {}
+        for tok, w in weights.items():
+            for n in range(MIN_PREFIX, min(len(tok), MAX_PREFIX) + 1):
+                key = tok[:n]
+                if out.get(key, 0) < w:
+                    out[key] = w
+        return out
+
+    @staticmethod
+    def _discard(postings, key, w, item):
+        """Drop `item` from postings[key][w] (or postings[key] when w is None), pruning empties."""
+        entry = postings.get(key)
+        if entry is None:
+            return
+        if w is None:
+            entry.discard(item)
+        else:
+            ids = entry.get(w)
+            if ids is not None:
+                ids.discard(item)
+                if not ids:
+                    del entry[w]
+        if not entry:
+            del postings[key]
+
+    def _term_tiers(self, term):
+        """[(score, ids)] for one query term, best first. Whole-token hits count double;
+        the same donor can appear in several tiers and takes the first (best) one."""
+        tiers = [(w * 2, ids) for w, ids in self._exact.get(term, {}).items()]
+        if MIN_PREFIX <= len(term) <= MAX_PREFIX:
+            tiers += self._prefixes.get(term, {}).items()
+        elif len(term) > MAX_PREFIX:
+            # Longer than the indexed prefixes: expand to the matching tokens instead
+            longer = {}
+            for tok in self._long_tokens.get(term[:MAX_PREFIX], ()):
+                if tok != term and tok.startswith(term):
+                    for w, ids in self._exact[tok].items():
+                        longer.setdefault(w, set()).update(ids)
+            tiers += longer.items()
+        tiers.sort(key=lambda t: t[0], reverse=True)
+        return tiers
+
+    def search(self, q, limit, allowed=None):
+        """Donor ids matching every term of `q` (prefix match), best score first, then
+        newest. With `allowed` (a set of ids), only those can match."""
+        terms = list(dict.fromkeys(tokenize(q)))
+        if not terms:
+            return []
+        with self._lock:
+            return self._rank([self._term_tiers(t) for t in terms], limit, allowed)
+
+    def _rank(self, per_term, limit, allowed=None):
+        # Start from the rarest term; each further term splits the score groups by
+        # its own tiers, so candidates only ever shrink and no donor is scored alone.
+        per_term.sort(key=lambda tiers: sum(len(ids) for _, ids in tiers))
+        groups = dict(self._disjoint(per_term[0]))
+        if allowed is not None:
+            groups = {s: ids & allowed for s, ids in groups.items() if not ids.isdisjoint(allowed)}
+            if not groups:
+                return []
+        for tiers in per_term[1:]:
+            candidates = set().union(*groups.values())
+            merged = {}
+            for score, ids in self._disjoint([(s, candidates & ids) for s, ids in tiers]):
+                for gscore, gids in groups.items():
+                    hit = gids & ids
+                    if hit:
+                        merged.setdefault(gscore + score, set()).update(hit)
+            groups = merged
+            if not groups:
+                return []
+        out = []
+        for score in sorted(groups, reverse=True):
+            out += sorted(groups[score], reverse=True)
+            if len(out) >= limit:
+                break
+        return out[:limit]
+
+    @staticmethod
+    def _disjoint(tiers):
+        """Keep each donor only in its best tier: [(score, ids)] with no overlap."""
+        out, seen = [], set()
+        for score, ids in tiers:
+            fresh = ids - seen
+            if fresh:
+                out.append((score, fresh))
+                seen |= fresh
+        return out
+
+
+def _boolean_query(q):
+    # Every term required, each as a prefix: "+ali* +colom*"
+    return " ".join(f"+{t}*" for t in tokenize(q))
+
+
+class DonorSearch:
+    """Picks the search backend from Config.SEARCH_BACKEND (auto/mysql/memory/like)."""
+
+    def __init__(self):
+        self._index = None
+        self._lock = threading.Lock()
+
+    def backend(self):
+        mode = Config.SEARCH_BACKEND
+        if mode == "auto":
+            mode = "mysql" if db.engine.dialect.name == "mysql" else "memory"
+        return mode
+
+    def ranked_ids(self, q, within=None, limit=None):
+        """(ids, truncated): donors matching `q`, best first, at most `limit`
+        (SEARCH_MAX_HITS). `within` is a filtered Donor query; the cap applies
+        after its filters, so a narrow filter never loses matches to the cap."""
+        limit = limit or Config.SEARCH_MAX_HITS
+        if self.backend() == "mysql":
+            expr = match(*[getattr(Donor, c) for c in SEARCH_COLUMNS], against=_boolean_query(q)).in_boolean_mode()
+            rows = ((within or Donor.query).with_entities(Donor.id).filter(expr)
+                    .order_by(expr.desc(), Donor.id.desc()).limit(limit + 1).all())
+            ids = [r.id for r in rows]
+        else:
+            allowed = None if within is None else {i for (i,) in within.with_entities(Donor.id)}
+            ids = self._memory_index().search(q, limit + 1, allowed)
+        return ids[:limit], len(ids) > limit
+
+    def _memory_index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    index = MemoryIndex()
+                    cols = [Donor.id] + [getattr(Donor, c) for c in SEARCH_COLUMNS]
+                    for row in db.session.query(*cols).yield_per(5000):
+                        index.add(row[0], dict(zip(SEARCH_COLUMNS, row[1:])))
+                    self._index = index
+        return self._index
+
+    # Called by the donor routes after a successful commit. Until the index has
+    # been built these are no-ops; the first search loads the current table.
+    def add(self, donor):
+        if self._index is not None:
+            self._index.add(donor.id, {c: getattr(donor, c) for c in SEARCH_COLUMNS})
+
+    def remove(self, donor_id):
+        if self._index is not None:
+            self._index.remove(donor_id)
+
+    def reset(self):
+        self._index = None
+
+
+donor_search = DonorSearch()
@@ -0,0 +1,175 @@
+"""Synthetic data for local load: donors with donation histories and years of stock movements.
+
+    python -m backend.seed --donors 1000000 --movements 3000000 --years 3 --seed 42
+    python -m backend.seed --reset --donors 100000     # fresh schema + admin first
+
+Rows are generated in fixed-size chunks across worker processes and written with
+core executemany inserts, one transaction per chunk. Every chunk draws from its
+own Random(seed, kind, chunk), and ids are assigned per chunk, so the same
+arguments always produce the same database regardless of --workers.
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func
+
+from .config import Config
+from .db import db
+from .models import Donor, Stock, StockMovement, BLOOD_GROUPS, normalize_area
+
+CHUNK = 20000
+
+# Approximate population frequencies (%) of BLOOD_GROUPS, O+ most common, AB- rarest
+GROUP_WEIGHTS = {"O+": 37.4, "O-": 6.6, "A+": 35.7, "A-": 6.3, "B+": 8.5, "B-": 1.5, "AB+": 3.4, "AB-": 0.6}
+
+FIRST = ["Amal", "Nimal", "Kamal", "Sunil", "Ayesha", "Fathima", "Ravi", "Priya", "Mohamed", "Aathil",
+         "Dilani", "Kasun", "Tharindu", "Sanduni", "Ishara", "Nadeesha", "Rizwan", "Lakshmi", "Chamara", "Hiruni",
+         "Ruwan", "Shanthi", "Ahamed", "Kavindi", "Suresh", "Malini", "Imran", "Janaki", "Pradeep", "Nirosha"]
+LAST = ["Perera", "Silva", "Fernando", "Jayasinghe", "Bandara", "Rajapaksha", "Hameed", "Kumar", "Wickrama", "Nazeer",
+        "Dissanayake", "Gunawardena", "Herath", "Rathnayake", "Marikar", "Sivakumar", "Weerasinghe", "Karunaratne"]
+# (area, weight): donors cluster around the big towns
+AREAS = [("Colombo", 24), ("Kandy", 12), ("Galle", 9), ("Jaffna", 8), ("Kurunegala", 8), ("Batticaloa", 6),
+         ("Matara", 6), ("Negombo", 7), ("Ampara", 5), ("Badulla", 5), ("Anuradhapura", 5), ("Trincomalee", 5)]
+STREETS = ["Main Street", "Temple Road", "Station Road", "Lake Road", "Hospital Road", "Church Street", "Beach Road"]
+# Movement mix per chunk: donations outnumber issues/discards so stock drifts upward
+REASONS = [("donation", 50), ("issue", 38), ("discard", 7), ("adjust", 5)]
+
+
+def _rng(seed, kind, chunk):
+    return random.Random(f"{seed}:{kind}:{chunk}")
+
+
+def donor_rows(args):
+    """Rows for one donor chunk: (seed, chunk index, first id, count, today)."""
+    seed, chunk, first_id, count, today = args
+    rnd = _rng(seed, "donors", chunk)
+    groups, gw = list(GROUP_WEIGHTS), list(GROUP_WEIGHTS.values())
+    areas, aw = [a for a, _ in AREAS], [w for _, w in AREAS]
+    rows = []
+    for i in range(count):
+        donor_id = first_id + i
+        first, last = rnd.choice(FIRST), rnd.choice(LAST)
+        area = rnd.choices(areas, aw)[0]
+        # ~25% have never donated; the rest donated within the last five years,
+        # regulars more recently than lapsed donors
+        last_donation = None
+        if rnd.random() >= 0.25:
+            last_donation = today - timedelta(days=int(rnd.expovariate(1 / 240)) % 1825)
+        created = datetime.combine(today, datetime.min.time()) - timedelta(days=rnd.randint(0, 1825))
+        rows.append({
+            "id": donor_id, "name": f"{first} {last}", "nic": f"{rnd.randint(195000000, 200599999)}V",
+            "phone": f"07{rnd.randint(0, 8)}{rnd.randint(0, 9999999):07d}",
+            "email": f"{first.lower()}.{last.lower()}{donor_id}@example.com" if rnd.random() < 0.7 else None,
+            "address": f"{rnd.randint(1, 400)} {rnd.choice(STREETS)}, {area}", "area": area,
+            "area_key": normalize_area(area),
+            "blood_group": rnd.choices(groups, gw)[0], "age": rnd.randint(18, 60),
+            "last_donation_date": last_donation, "notes": None, "active": rnd.random() < 0.9,
+            "created_at": created, "updated_at": created,
+        })
+    return rows
+
+
+def movement_rows(args):
+    """Rows for one movement chunk covering [start, end). Issues/discards only draw on
+    units received earlier in the same chunk, so stock can never go negative."""
+    seed, chunk, first_id, count, start, end = args
+    rnd = _rng(seed, "movements", chunk)
+    reasons, rw = [r for r, _ in REASONS], [w for _, w in REASONS]
+    groups, gw = list(GROUP_WEIGHTS), list(GROUP_WEIGHTS.values())
+    span = (end - start).total_seconds()
+    stamps = sorted(start + timedelta(seconds=rnd.random() * span) for _ in range(count))
+    units = dict.fromkeys(groups, 0)
+    rows = []
+    for i, ts in enumerate(stamps):
+        bg, reason = rnd.choices(groups, gw)[0], rnd.choices(reasons, rw)[0]
+        if reason == "donation":
+            delta = rnd.choice((1, 1, 1, 2))
+        elif reason == "adjust":
+            delta = rnd.choice((1, -1)) if units[bg] > 0 else 1
+        else:
+            delta = -min(units[bg], rnd.choice((1, 1, 2, 3)))
+            if delta == 0:
+                reason, delta = "donation", 1
+        units[bg] += delta
+        rows.append({"id": first_id + i, "blood_group": bg, "delta": delta, "reason": reason,
+                     "timestamp": ts, "user_id": None})
+    return rows
+
+
+def _chunks(total, size):
+    return [(i, i * size, min(size, total - i * size)) for i in range((total + size - 1) // size)]
+
+
+def _load(table, jobs, fn, workers, label):
+    t0 = time.perf_counter()
+    written = 0
+    with multiprocessing.Pool(workers) as pool:
+        for rows in pool.imap(fn, jobs):  # imap keeps chunk order: ids ascend
+            db.session.execute(table.insert(), rows)
+            db.session.commit()
+            written += len(rows)
+    print(f"{label}: {written} rows in {time.perf_counter() - t0:.1f}s")
+    return written
+
+
+def seed(donors=0, movements=0, years=3, seed=42, workers=None, today=None):
+    """Append synthetic rows to the current app's database, then bring Stock.units
+    and the daily rollup in line with the movement history."""
+    from .rollup import rebuild
+    from .archive import movement_totals
+    workers = workers or multiprocessing.cpu_count()
+    today = today or date.today()
+    if donors:
+        base = (db.session.query(func.max(Donor.id)).scalar() or 0) + 1
+        jobs = [(seed, i, base + off, n, today) for i, off, n in _chunks(donors, CHUNK)]
+        _load(Donor.__table__, jobs, donor_rows, workers, "donors")
+    if movements:
+        base = (db.session.query(func.max(StockMovement.id)).scalar() or 0) + 1
+        chunks = _chunks(movements, CHUNK)
+        end = datetime.combine(today, datetime.min.time())
+        start = end - timedelta(days=365 * years)
+        step = (end - start) / len(chunks)
+        jobs = [(seed, i, base + off, n, start + step * i, start + step * (i + 1)) for i, off, n in chunks]
+        _load(StockMovement.__table__, jobs, movement_rows, workers, "movements")
+
+    totals = movement_totals()
+    existing = {s.blood_group: s for s in Stock.query.all()}
+    for g in BLOOD_GROUPS:
+        units = int(totals.get(g) or 0)
+        if g in existing:
+            existing[g].units = units
+        else:
+            db.session.add(Stock(blood_group=g, units=units))
+    db.session.commit()
+    if movements:
+        print(f"rollup: {rebuild()} rows")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--donors", type=int, default=100000)
+    ap.add_argument("--movements", type=int, default=300000)
+    ap.add_argument("--years", type=int, default=3, help="movement history spans this many years")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--workers", type=int, default=None, help="generator processes (default: CPU count)")
+    ap.add_argument("--today", type=date.fromisoformat, default=None,
+                    help="YYYY-MM-DD the history ends on (default: today); fix it for byte-identical reruns")
+    ap.add_argument("--reset", action="store_true", help="drop and recreate all tables (and the admin user) first")
+    args = ap.parse_args()
+
+    Config.SLOW_QUERY_MS = float("inf")  # every bulk chunk would be logged
+    if args.reset:
+        from .create_db import main as create_db
+        create_db()
+    from .app import create_app
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        seed(args.donors, args.movements, args.years, args.seed, args.workers, args.today)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import json
+from datetime import date, datetime
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is a few times slower but identical on the wire
+    orjson = None
+try:
+    import msgpack
+except ImportError:  # optional: listings are JSON only
+    msgpack = None
+
+# Lean listing path: list endpoints select plain column tuples (no ORM entities,
+# no to_dict) and hand them to a fast encoder; orjson formats dates/datetimes
+# natively, the stdlib fallback does the same via isoformat().
+#
+#   ?fields=id,name,blood_group    only these columns (id is always included)
+#   ?shape=objects                 [{"id": 1, "name": ...}, ...]     (default)
+#   ?shape=rows                    {"fields": [...], "rows": [[1, ...], ...]}
+#   ?shape=columns                 {"fields": [...], "columns": {"id": [...], ...}}
+#
+# Listings are also available as MessagePack (same structure, binary, dates as ISO
+# strings) to clients that send `Accept: application/x-msgpack`.
+
+DONOR_FIELDS = ("id", "name", "nic", "phone", "email", "address", "area", "blood_group", "age",
+                "last_donation_date", "notes", "active", "created_at", "updated_at")
+MOVEMENT_FIELDS = ("id", "blood_group", "delta", "reason", "timestamp", "user_id")
+SHAPES = ("objects", "rows", "columns")
+MSGPACK = "application/x-msgpack"
+
+
+def _default(obj):
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(obj, status=200):
+    return Response(dumps(obj), status=status, mimetype="application/json")
+
+
+def _wants_msgpack():
+    if msgpack is None:
+        return False
+    return request.accept_mimetypes.best_match(["application/json", MSGPACK]) == MSGPACK
+
+
+def projection(allowed):
+    """(fields, shape) from ?fields= / ?shape=; raises ValueError on unknown names."""
+    raw = request.args.get("fields", "").strip()
+    if raw:
+        fields = [f.strip() for f in raw.split(",") if f.strip()]
+        unknown = [f for f in fields if f not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+        # id first: cursors and clients key on it
+        fields = ["id"] + [f for f in dict.fromkeys(fields) if f != "id"]
+    else:
+        fields = list(allowed)
+    shape = request.args.get("shape", "objects")
+    if shape not in SHAPES:
+        raise ValueError(f"shape must be one of {', '.join(SHAPES)}")
+    return fields, shape
+
+
+def columns_of(model, fields):
+    return [getattr(model, f) for f in fields]
+
+
+def listing(key, fields, shape, rows, **extra):
+    """JSON response for column-tuple `rows`, shaped as requested."""
+    if shape == "rows":
+        body = {"fields": fields, "rows": [tuple(r) for r in rows]}
+    elif shape == "columns":
+        body = {"fields": fields, "columns": dict(zip(fields, map(list, zip(*rows)))) if rows else {f: [] for f in fields}}
+    else:
+        body = {key: [dict(zip(fields, r)) for r in rows]}
+    body.update(extra)
+    return negotiated_response(body)
+
+
+def negotiated_response(body):
+    """JSON, or MessagePack for clients that ask for it."""
+    if _wants_msgpack():
+        resp = Response(msgpack.packb(body, default=_default, use_bin_type=True), mimetype=MSGPACK)
+    else:
+        resp = json_response(body)
+    resp.vary.add("Accept")
+    return resp
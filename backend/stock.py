@@ -0,0 +1,124 @@
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from .cache import read_cache
+from .changes import change_feed
+from .config import Config
+from .db import db
+from .models import Stock, StockMovement
+from .rollup import record_movement, record_totals, rollup_values, COLUMNS
+
+# Contention-safe stock adjustments. Units change only through a single conditional
+# UPDATE (units = units + delta WHERE units + delta >= 0), so concurrent desks can
+# neither lose updates nor drive stock negative. The row lock taken by that UPDATE
+# is held until commit, which also covers the movement and rollup inserts.
+
+# MySQL 1213 = deadlock, 1205 = lock wait timeout; SQLite reports "database is locked"
+RETRYABLE_MYSQL_CODES = {1205, 1213}
+
+
+class InsufficientStock(Exception):
+    def __init__(self, blood_group):
+        super().__init__(f"Not enough units of {blood_group}")
+        self.blood_group = blood_group
+
+
+def _retryable(exc):
+    orig = getattr(exc, "orig", None)
+    code = orig.args[0] if orig is not None and orig.args else None
+    return code in RETRYABLE_MYSQL_CODES or "database is locked" in str(orig)
+
+
+def run_in_transaction(work):
+    """Run `work()` and commit, retrying deadlocks/lock timeouts with jittered backoff."""
+    for attempt in range(Config.STOCK_RETRIES + 1):
+        try:
+            result = work()
+            db.session.commit()
+            return result
+        except OperationalError as e:
+            db.session.rollback()
+            if attempt == Config.STOCK_RETRIES or not _retryable(e):
+                raise
+            time.sleep(Config.STOCK_RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+def _ensure_row(blood_group):
+    # Another desk may create the same row concurrently; the unique constraint decides.
+    try:
+        with db.session.begin_nested():
+            db.session.add(Stock(blood_group=blood_group, units=0))
+    except IntegrityError:
+        pass
+
+
+def _bump_units(blood_group, delta):
+    stmt = (update(Stock)
+            .where(Stock.blood_group == blood_group, Stock.units + delta >= 0)
+            .values(units=Stock.units + delta)
+            .execution_options(synchronize_session=False))
+    if db.session.execute(stmt).rowcount == 0:
+        if db.session.query(Stock.id).filter_by(blood_group=blood_group).first() is not None:
+            raise InsufficientStock(blood_group)
+        _ensure_row(blood_group)
+        if db.session.execute(stmt).rowcount == 0:
+            raise InsufficientStock(blood_group)
+
+
+def apply_delta(blood_group, delta, reason, now):
+    """Apply one change inside the current transaction; raises InsufficientStock."""
+    _bump_units(blood_group, delta)
+    mv = StockMovement(blood_group=blood_group, delta=delta, reason=reason, timestamp=now, user_id=None)
+    db.session.add(mv)
+    record_movement(now.date(), blood_group, delta, reason)
+    return mv
+
+
+def adjust(blood_group, delta, reason):
+    """Atomically adjust one group. Returns (stock dict, movement dict)."""
+    def work():
+        mv = apply_delta(blood_group, delta, reason, datetime.utcnow())
+        db.session.flush()
+        units = db.session.query(Stock.id, Stock.units).filter_by(blood_group=blood_group).one()
+        return {"id": units.id, "blood_group": blood_group, "units": units.units}, mv.to_dict()
+    result = run_in_transaction(work)
+    read_cache.invalidate()
+    change_feed.notify()
+    return result
+
+
+def adjust_batch(lines):
+    """Apply [(blood_group, delta, reason)] all-or-nothing in one transaction.
+
+    Deltas are netted per group and applied in sorted group order (one UPDATE per
+    group, consistent lock order across desks); movements go in as one executemany.
+    Returns the number of movements written."""
+    def work():
+        now = datetime.utcnow()
+        net = {}
+        totals = {}
+        for bg, delta, reason in lines:
+            net[bg] = net.get(bg, 0) + delta
+            t = totals.setdefault(bg, dict.fromkeys(COLUMNS, 0))
+            for col, v in rollup_values(delta, reason).items():
+                t[col] += v
+        for bg in sorted(net):
+            _bump_units(bg, net[bg])
+        db.session.execute(StockMovement.__table__.insert(), [
+            {"blood_group": bg, "delta": delta, "reason": reason, "timestamp": now, "user_id": None}
+            for bg, delta, reason in lines
+        ])
+        for bg in sorted(totals):
+            record_totals(now.date(), bg, totals[bg])
+        return len(lines)
+    applied = run_in_transaction(work)
+    read_cache.invalidate()
+    change_feed.notify()
+    return applied
@@ -0,0 +1,80 @@
+from sqlalchemy import bindparam, inspect
+
+from .db import db
+from .models import Donor, normalize_area
+
+# Brings a database created by an older version up to the current models:
+# new tables, new (nullable) columns and indexes, then backfills donors.area_key.
+# Safe to re-run; `python -m backend.upgrade`.
+
+BACKFILL_CHUNK = 5000
+
+
+def add_missing_columns():
+    """ALTER TABLE ... ADD COLUMN for model columns the database lacks. Returns their names."""
+    insp = inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(db.engine.dialect)}"
+            db.session.execute(db.text(ddl))
+            added.append(f"{table.name}.{col.name}")
+    db.session.commit()
+    return added
+
+
+def add_missing_indexes():
+    insp = inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {ix["name"] for ix in insp.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                added.append(index.name)
+        if table.name == "donors" and db.engine.dialect.name == "mysql" and "ft_donors_search" not in existing:
+            # Created by the after_create hook on new databases only
+            db.session.execute(db.text(
+                "ALTER TABLE donors ADD FULLTEXT INDEX ft_donors_search "
+                "(name, phone, email, address, area) WITH PARSER ngram"))
+            added.append("ft_donors_search")
+    return added
+
+
+def backfill_area_keys(chunk=BACKFILL_CHUNK):
+    """Fill donors.area_key from area where it is missing. Leaves updated_at alone,
+    so desk replicas don't re-download every donor. Returns the rows updated."""
+    t = Donor.__table__
+    stmt = (t.update().where(t.c.id == bindparam("_id"))
+            .values(area_key=bindparam("_key"), updated_at=t.c.updated_at))
+    done, last = 0, 0
+    while True:
+        rows = db.session.execute(
+            db.select(t.c.id, t.c.area)
+            .where(t.c.id > last, t.c.area.is_not(None), t.c.area_key.is_(None))
+            .order_by(t.c.id).limit(chunk)).all()
+        if not rows:
+            return done
+        db.session.execute(stmt, [{"_id": i, "_key": normalize_area(area)} for i, area in rows])
+        db.session.commit()
+        done += len(rows)
+        last = rows[-1][0]
+
+
+def main():
+    from .app import create_app
+    app = create_app()
+    with app.app_context():
+        db.create_all()  # new tables only; existing ones are handled below
+        for name in add_missing_columns():
+            print(f"Added column {name}")
+        for name in add_missing_indexes():
+            print(f"Added index {name}")
+        print(f"Backfilled area_key on {backfill_area_keys()} donors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import logging
+
+from .app import create_app
+from .config import Config
+
+# Production entry point.
+#
+#   python -m backend.wsgi                      # waitress, works on Windows too
+#   gunicorn -w 4 -k gthread --threads 16 -b 0.0.0.0:5000 backend.wsgi:app
+#
+# One process with WSGI_THREADS threads is plenty for a hospital LAN. With gunicorn,
+# every worker process gets its own engine pool (DB_POOL_SIZE + DB_MAX_OVERFLOW
+# connections), so workers x that must stay under MySQL's max_connections.
+
+app = create_app()
+
+
+def main():
+    from waitress import serve
+
+    ap = argparse.ArgumentParser(description="Serve the Blood Desk API with waitress")
+    ap.add_argument("--host", default=Config.APP_HOST)
+    ap.add_argument("--port", type=int, default=Config.APP_PORT)
+    ap.add_argument("--threads", type=int, default=Config.WSGI_THREADS)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    print(f"Serving on http://{args.host}:{args.port} ({args.threads} threads)")
+    serve(app, host=args.host, port=args.port, threads=args.threads,
+          connection_limit=Config.WSGI_CONNECTION_LIMIT, ident="blood-desk")
+
+
+if __name__ == "__main__":
+    main()
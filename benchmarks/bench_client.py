@@ -0,0 +1,75 @@
+"""Desktop client calls/sec: one-shot requests vs. the pooled ApiClient session.
+
+Serves the backend (temporary SQLite DB) from a local waitress server
+and hammers GET /health (transport only) and GET /api/stock both ways. On
+loopback the gain is the saved connect/teardown; on a LAN add one round-trip
+per call for the one-shot path.
+
+    python -m benchmarks.bench_client --calls 2000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import requests
+from waitress.server import create_server
+
+from backend.config import Config
+from benchmarks.common import auth_headers
+
+
+def serve(app):
+    # waitress, not werkzeug: the dev server sends "Connection: close" on every response
+    server = create_server(app, host="127.0.0.1", port=0, threads=4)
+    threading.Thread(target=server.run, daemon=True).start()
+    return server
+
+
+def rate(label, fn, calls):
+    fn()  # warm up
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<34}{calls / elapsed:>10.0f} calls/s {elapsed / calls * 1000:>8.2f} ms/call")
+    return calls / elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--calls", type=int, default=1000)
+    args = ap.parse_args()
+
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_client.db')}"
+    Config.CACHE_TTL = 0  # measure the transport, not the read cache
+    from backend.app import create_app
+    from backend.db import db
+    from desktop.api import ApiClient
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    server = serve(app)
+    base = f"http://127.0.0.1:{server.effective_port}"
+
+    client = ApiClient(base=base)
+    headers = auth_headers()
+    client.session.headers.update(headers)
+    for path in ("/health", "/api/stock"):
+        def one_shot():
+            requests.get(f"{base}{path}", headers=headers).raise_for_status()
+
+        def pooled():
+            client._request("GET", f"{base}{path}").raise_for_status()
+
+        print(f"GET {path}")
+        before = rate("  requests.get per call (before)", one_shot, args.calls)
+        after = rate("  ApiClient pooled session (after)", pooled, args.calls)
+        print(f"  speedup: {after / before:.2f}x")
+    client.close()
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
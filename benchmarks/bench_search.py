@@ -0,0 +1,96 @@
+"""Donor search: LIKE scan vs. search index.
+
+Seeds a throwaway SQLite database and times /api/donors/search through the
+Flask test client with each backend.
+
+    python -m benchmarks.bench_search --rows 500000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from backend.config import Config
+from benchmarks.common import test_client
+
+FIRST = ["Amal", "Nimal", "Kamal", "Sunil", "Ayesha", "Fathima", "Ravi", "Priya", "Mohamed", "Aathil",
+         "Dilani", "Kasun", "Tharindu", "Sanduni", "Ishara", "Nadeesha", "Rizwan", "Lakshmi", "Chamara", "Hiruni"]
+LAST = ["Perera", "Silva", "Fernando", "Jayasinghe", "Bandara", "Rajapaksha", "Hameed", "Kumar", "Wickrama", "Nazeer"]
+AREAS = ["Colombo", "Kandy", "Galle", "Jaffna", "Kurunegala", "Batticaloa", "Matara", "Negombo", "Ampara", "Badulla"]
+# Common terms (many hits, LIKE stops early), rare terms and misses (LIKE scans the table)
+QUERIES = ["perera", "kandy", "nimal silva", "077", "fathima hameed", "galle road", "sun",
+           "ali", "rizwan.nazeer12", "nobody"]
+
+
+def seed(app, rows):
+    from backend.db import db
+    from backend.models import Donor, BLOOD_GROUPS
+    rnd = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        batch = []
+        for i in range(rows):
+            first, last, area = rnd.choice(FIRST), rnd.choice(LAST), rnd.choice(AREAS)
+            batch.append({
+                "name": f"{first} {last}", "phone": f"07{rnd.randint(0, 99999999):08d}",
+                "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+                "address": f"{rnd.randint(1, 400)} {rnd.choice(AREAS)} Road", "area": area,
+                "blood_group": rnd.choice(BLOOD_GROUPS), "active": True,
+            })
+            if len(batch) == 10000:
+                db.session.execute(Donor.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(Donor.__table__.insert(), batch)
+        db.session.commit()
+
+
+def run(client, repeat):
+    timings = {}
+    for q in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            r = client.get("/api/donors/search", query_string={"q": q, "limit": 50})
+            samples.append((time.perf_counter() - t0) * 1000)
+            assert r.status_code == 200, r.data
+        timings[q] = statistics.median(samples)
+    return timings
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_search.db")
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+    from backend.app import create_app
+    from backend.search import donor_search
+    app = create_app()
+    t0 = time.perf_counter()
+    seed(app, args.rows)
+    print(f"seeded {args.rows} donors in {time.perf_counter() - t0:.1f}s ({path})")
+
+    client = test_client(app)
+    results = {}
+    for backend in ("like", "memory"):
+        Config.SEARCH_BACKEND = backend
+        donor_search.reset()
+        with app.app_context():
+            t0 = time.perf_counter()
+            client.get("/api/donors/search", query_string={"q": "warmup"})
+            print(f"[{backend}] first query (incl. index build) {(time.perf_counter() - t0) * 1000:.0f} ms")
+        results[backend] = run(client, args.repeat)
+
+    print(f"\n{'query':<18}{'like ms':>10}{'index ms':>10}{'speedup':>10}")
+    for q in QUERIES:
+        like, idx = results["like"][q], results["memory"][q]
+        print(f"{q:<18}{like:>10.1f}{idx:>10.1f}{like / idx:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Concurrent stock adjustments: throughput and consistency.
+
+Fires many /api/stock/adjust calls from parallel threads and then checks that
+every Stock.units equals the sum of its StockMovement.delta and never went negative.
+
+    python -m benchmarks.bench_stock_concurrency --threads 16 --ops 500
+    python -m benchmarks.bench_stock_concurrency --uri mysql+pymysql://root:@127.0.0.1/blood_bench
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from backend.config import Config
+from benchmarks.common import test_client
+
+GROUPS = ("O+", "O-", "A+")  # few groups -> heavy contention on each row
+
+
+def worker(app, ops, seed, results):
+    client = test_client(app)
+    rnd = random.Random(seed)
+    counts = Counter()
+    for _ in range(ops):
+        delta = rnd.choice((1, 1, 2, -1, -1, -2, -3))
+        reason = "donation" if delta > 0 else rnd.choice(("issue", "discard"))
+        r = client.post("/api/stock/adjust", json={"blood_group": rnd.choice(GROUPS), "delta": delta, "reason": reason})
+        counts["ok" if r.status_code == 200 else "rejected" if r.status_code == 400 else f"http {r.status_code}"] += 1
+    results.append(counts)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--ops", type=int, default=250, help="adjustments per thread")
+    ap.add_argument("--uri", help="database URI (default: temporary SQLite file)")
+    args = ap.parse_args()
+
+    Config.SQLALCHEMY_DATABASE_URI = args.uri or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_stock.db')}"
+    from backend.app import create_app
+    from backend.db import db
+    from backend.models import Stock, StockMovement, BLOOD_GROUPS
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all(Stock(blood_group=g, units=0) for g in BLOOD_GROUPS)
+        db.session.commit()
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(app, args.ops, i, results)) for i in range(args.threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    total = sum(results, Counter())
+    n = args.threads * args.ops
+    print(f"{n} adjustments from {args.threads} threads in {elapsed:.2f}s ({n / elapsed:.0f}/s): {dict(total)}")
+
+    with app.app_context():
+        units = dict(db.session.query(Stock.blood_group, Stock.units).all())
+        sums = dict(db.session.query(StockMovement.blood_group, db.func.sum(StockMovement.delta))
+                    .group_by(StockMovement.blood_group).all())
+        moves = db.session.query(db.func.count(StockMovement.id)).scalar()
+    ok = True
+    for g in GROUPS:
+        match = units[g] == (sums.get(g) or 0) and units[g] >= 0
+        ok &= match
+        print(f"{g:>4}: units={units[g]:<6} sum(delta)={sums.get(g) or 0:<6} {'OK' if match else 'MISMATCH'}")
+    ok &= moves == total["ok"]
+    print(f"movements={moves} successful adjustments={total['ok']}")
+    print("consistent" if ok else "INCONSISTENT")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Bytes on the wire and client decode time per listing format and encoding.
+
+Fetches 1000-row pages of /api/donors and /api/stock/movements through the test
+client as JSON objects (the old default), JSON rows and MessagePack rows, each
+uncompressed, gzip and brotli, and times the client side (decompress + parse).
+Transfer time is bytes / link speed: at 1 MB/s, 100 KB costs 100 ms.
+
+    python -m benchmarks.bench_wire --scale 100k
+"""
+import argparse
+import gzip
+import json
+import statistics
+import tempfile
+import time
+
+import brotli
+import msgpack
+
+from benchmarks.common import test_client
+from benchmarks.suite import SCALES, prepare
+
+TABLE_FIELDS = "id,name,blood_group,area,phone,last_donation_date"
+CASES = [
+    ("donors json objects", "/api/donors", {"limit": 1000}, "application/json"),
+    ("donors json rows", "/api/donors", {"limit": 1000, "fields": TABLE_FIELDS, "shape": "rows"}, "application/json"),
+    ("donors msgpack rows", "/api/donors", {"limit": 1000, "fields": TABLE_FIELDS, "shape": "rows"}, "application/x-msgpack"),
+    ("movements json objects", "/api/stock/movements", {"limit": 1000}, "application/json"),
+    ("movements msgpack cols", "/api/stock/movements", {"limit": 1000, "shape": "columns"}, "application/x-msgpack"),
+]
+DECOMPRESS = {"identity": lambda b: b, "gzip": gzip.decompress, "br": brotli.decompress}
+
+
+def decode(body, mimetype):
+    return msgpack.unpackb(body, raw=False) if mimetype == "application/x-msgpack" else json.loads(body)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scale", default="10k", choices=list(SCALES))
+    ap.add_argument("--data-dir", default=tempfile.gettempdir())
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    app = prepare(None, SCALES[args.scale], args.data_dir)
+    client = test_client(app)
+    print(f"{'case':<24}{'encoding':>10}{'bytes':>10}{'decode ms':>11}")
+    for label, url, params, accept in CASES:
+        for encoding in ("identity", "gzip", "br"):
+            r = client.get(url, query_string=params, headers={"Accept": accept, "Accept-Encoding": encoding})
+            assert r.status_code == 200 and r.headers.get("Content-Encoding", "identity") == encoding, r.headers
+            body = r.get_data()
+            samples = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                decode(DECOMPRESS[encoding](body), r.mimetype)
+                samples.append((time.perf_counter() - t0) * 1000)
+            print(f"{label:<24}{encoding:>10}{len(body):>10}{statistics.median(samples):>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""Shared helpers for the benchmark scripts."""
+from types import SimpleNamespace
+
+
+def auth_headers():
+    """Authorization header with a session token signed by this process's SECRET_KEY
+    (valid for any backend sharing that key, e.g. one started from the same .env)."""
+    from backend.auth import issue_token
+    token, _ = issue_token(SimpleNamespace(id=0, role="bench"))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_client(app):
+    """Flask test client that sends auth_headers() on every request."""
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = auth_headers()["Authorization"]
+    return client
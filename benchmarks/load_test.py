@@ -0,0 +1,147 @@
+"""Load test: p50/p99 latency and throughput of the main endpoints per server config.
+
+For each --threads value it starts `python -m backend.wsgi` (waitress) against
+the same database, then --concurrency client threads (one keep-alive session
+each) hit a weighted mix of endpoints for --duration seconds. By default the
+database is a fresh SQLite file seeded with --rows donors; pass --db-url to load
+test MySQL (already populated), or --url to drive a server you started yourself.
+
+    python -m benchmarks.load_test --threads 4,16,32 --concurrency 32 --duration 15
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from backend.config import Config
+from benchmarks.common import auth_headers
+
+# (label, method, path, params/json, weight)
+MIX = [
+    ("GET stock", "GET", "/api/stock", None, 30),
+    ("GET analytics", "GET", "/api/analytics/summary", {"days": 30}, 10),
+    ("GET donors", "GET", "/api/donors", {"limit": 100}, 20),
+    ("GET search", "GET", "/api/donors/search", {"q": "perera", "limit": 50}, 20),
+    ("GET eligible", "GET", "/api/donors/eligible", {"blood_group": "A+", "limit": 50}, 10),
+    ("POST adjust", "POST", "/api/stock/adjust", {"blood_group": "O+", "delta": 1, "reason": "donation"}, 10),
+]
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def prepare_sqlite(rows):
+    from benchmarks.bench_search import seed
+    from backend.app import create_app
+    from backend.db import db
+    from backend.models import Stock, BLOOD_GROUPS
+    path = os.path.join(tempfile.mkdtemp(), "load_test.db")
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+    app = create_app()
+    seed(app, rows)
+    with app.app_context():
+        db.session.add_all(Stock(blood_group=g, units=100) for g in BLOOD_GROUPS)
+        db.session.commit()
+    return Config.SQLALCHEMY_DATABASE_URI
+
+
+def start_server(db_url, port, threads):
+    env = dict(os.environ, DATABASE_URL=db_url)
+    proc = subprocess.Popen([sys.executable, "-m", "backend.wsgi", "--port", str(port), "--threads", str(threads)],
+                            env=env, stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base}/health", timeout=1).raise_for_status()
+            return proc, base
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def drive(base, concurrency, duration):
+    labels = [m[0] for m in MIX]
+    weights = [m[4] for m in MIX]
+    results = {label: [] for label in labels}
+    errors = [0]
+    stop = time.perf_counter() + duration
+    lock = threading.Lock()
+
+    def client(seed):
+        rnd = random.Random(seed)
+        session = requests.Session()
+        session.headers.update(auth_headers())
+        local = {label: [] for label in labels}
+        failed = 0
+        while time.perf_counter() < stop:
+            label, method, path, payload, _ = MIX[rnd.choices(range(len(MIX)), weights)[0]]
+            kw = {"json": payload} if method == "POST" else {"params": payload}
+            t0 = time.perf_counter()
+            try:
+                ok = session.request(method, base + path, timeout=30, **kw).ok
+            except requests.RequestException:
+                ok = False
+            if ok:
+                local[label].append((time.perf_counter() - t0) * 1000)
+            else:
+                failed += 1
+        with lock:
+            for label, samples in local.items():
+                results[label] += samples
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors[0], time.perf_counter() - t0
+
+
+def report(title, results, errors, elapsed):
+    total = sum(len(s) for s in results.values())
+    print(f"\n{title}: {total / elapsed:.0f} req/s, {total} ok, {errors} errors in {elapsed:.1f}s")
+    print(f"  {'endpoint':<16}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, samples in results.items():
+        print(f"  {label:<16}{len(samples):>8}{percentile(samples, 50):>10.1f}{percentile(samples, 99):>10.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--threads", default="4,16,32", help="comma-separated waitress thread counts")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=10)
+    ap.add_argument("--rows", type=int, default=50000)
+    ap.add_argument("--db-url", help="load test this database instead of a seeded SQLite file")
+    ap.add_argument("--url", help="drive an already running server (ignores --threads)")
+    ap.add_argument("--port", type=int, default=5099)
+    args = ap.parse_args()
+
+    if args.url:
+        report(args.url, *drive(args.url.rstrip("/"), args.concurrency, args.duration))
+        return
+    db_url = args.db_url or prepare_sqlite(args.rows)
+    for threads in [int(t) for t in args.threads.split(",")]:
+        proc, base = start_server(db_url, args.port, threads)
+        try:
+            report(f"waitress threads={threads}, clients={args.concurrency}",
+                   *drive(base, args.concurrency, args.duration))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
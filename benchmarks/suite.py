@@ -0,0 +1,189 @@
+"""Backend hot-path benchmark suite with baseline comparison.
+
+Seeds synthetic donors and stock movements at each --scale (cached per scale
+in --data-dir so reruns skip seeding), then times the hot endpoints through the
+Flask test client: search, list (first and deep page), CSV export, single and
+concurrent stock adjustments and the analytics summary. Results (median ms;
+lower is better) are written as JSON and compared with a stored baseline:
+
+    python -m benchmarks.suite --scale 10k,100k
+    python -m benchmarks.suite --scale 10k --save-baseline   # refresh benchmarks/baseline.json
+    python -m benchmarks.suite --uri mysql+pymysql://root:@127.0.0.1/blood_bench --scale 100k
+
+Exits non-zero when a case is slower than baseline x --tolerance. Baselines are
+machine-specific: record them on the machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from backend.config import Config
+from benchmarks.common import test_client
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+SEARCH_QUERIES = ["perera", "kandy", "nimal silva", "077", "nobody"]
+
+
+def seed(app, rows):
+    """`rows` donors plus as many stock movements over the last year (backend.seed)."""
+    from backend.seed import seed as seed_data
+    with app.app_context():
+        seed_data(donors=rows, movements=rows, years=1, seed=42)
+
+
+def prepare(uri, rows, data_dir):
+    if uri is None:
+        path = os.path.join(data_dir, f"blood_desk_bench_{rows}.db")
+        uri = f"sqlite:///{path}"
+        fresh = not os.path.exists(path)
+    else:
+        fresh = True
+    Config.SQLALCHEMY_DATABASE_URI = uri
+    from backend.app import create_app
+    from backend.db import db
+    app = create_app()
+    if fresh:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+        t0 = time.perf_counter()
+        seed(app, rows)
+        print(f"  seeded {rows} donors + movements in {time.perf_counter() - t0:.1f}s")
+    return app
+
+
+def timed(fn, repeat):
+    fn()  # warm up (index build, caches, page cache)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def get(client, url, **params):
+    r = client.get(url, query_string=params)
+    assert r.status_code == 200, (url, r.status_code, r.data[:200])
+    return r
+
+
+def run_cases(app, repeat, threads):
+    client = test_client(app)
+    results = {}
+
+    for q in SEARCH_QUERIES:
+        results[f"search_donors[{q}]"] = timed(lambda: get(client, "/api/donors/search", q=q, limit=50), repeat)
+
+    results["list_donors[first]"] = timed(lambda: get(client, "/api/donors", limit=100), repeat)
+    cursor = get(client, "/api/donors", limit=1000).json["next_cursor"]
+    for _ in range(4):
+        cursor = get(client, "/api/donors", limit=1000, cursor=cursor).json["next_cursor"] or cursor
+    results["list_donors[deep]"] = timed(lambda: get(client, "/api/donors", limit=100, cursor=cursor), repeat)
+
+    # Audit-style reads: a quarter of movement history, first page and a later one
+    start = (datetime.utcnow() - timedelta(days=91)).date().isoformat()
+    results["movements[quarter]"] = timed(lambda: get(client, "/api/stock/movements", limit=1000, **{"from": start}), repeat)
+    results["movements[quarter, O+]"] = timed(
+        lambda: get(client, "/api/stock/movements", limit=1000, blood_group="O+", **{"from": start}), repeat)
+    cursor = get(client, "/api/stock/movements", limit=1000, **{"from": start}).json["next_cursor"]
+    results["movements[quarter, page 2]"] = timed(
+        lambda: get(client, "/api/stock/movements", limit=1000, cursor=cursor or "", **{"from": start}), repeat)
+
+    results["export_donors_csv"] = timed(lambda: get(client, "/api/export/donors.csv").get_data(), max(1, repeat // 5))
+
+    def adjust(c, delta=1):
+        r = c.post("/api/stock/adjust", json={"blood_group": "O+", "delta": delta, "reason": "donation"})
+        assert r.status_code == 200, r.data
+    results["adjust_stock[single]"] = timed(lambda: adjust(client), repeat * 4)
+
+    def concurrent():
+        def work():
+            c = test_client(app)
+            for _ in range(10):
+                adjust(c)
+        ts = [threading.Thread(target=work) for _ in range(threads)]
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join()
+    # per-operation cost with `threads` desks writing at once
+    results[f"adjust_stock[concurrent x{threads}]"] = round(timed(concurrent, max(1, repeat // 2)) / (threads * 10), 3)
+
+    Config.CACHE_TTL = 0  # time the query, not the read cache
+    for days in (30, 365):
+        results[f"analytics_summary[{days}d]"] = timed(lambda: get(client, "/api/analytics/summary", days=days), repeat)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print current vs. baseline; return the cases that regressed."""
+    regressions = []
+    print(f"\n{'case':<44}{'ms':>10}{'baseline':>10}{'ratio':>8}")
+    for scale, cases in results.items():
+        for case, ms in cases.items():
+            base = baseline.get(scale, {}).get(case)
+            ratio = ms / base if base else None
+            flag = ""
+            if ratio is not None and ratio > tolerance:
+                regressions.append(f"{scale}/{case}")
+                flag = "  REGRESSION"
+            print(f"{scale + '/' + case:<44}{ms:>10.2f}{base or 0:>10.2f}{(ratio or 0):>7.2f}x{flag}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scale", default="10k", help="comma-separated: " + ",".join(SCALES))
+    ap.add_argument("--uri", help="database URI (default: cached SQLite file per scale)")
+    ap.add_argument("--data-dir", default=tempfile.gettempdir())
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--tolerance", type=float, default=1.5, help="fail when slower than baseline x this")
+    ap.add_argument("--save-baseline", action="store_true")
+    args = ap.parse_args()
+
+    Config.SLOW_QUERY_MS = float("inf")  # SQLite lock waits would flood the slow-query log
+    results = {}
+    for scale in args.scale.lower().split(","):
+        print(f"[{scale}]")
+        Config.CACHE_TTL = float(os.getenv("CACHE_TTL", "5"))
+        app = prepare(args.uri, SCALES[scale], args.data_dir)
+        from backend.search import donor_search
+        donor_search.reset()  # a new database per scale
+        results[scale] = run_cases(app, args.repeat, args.threads)
+
+    report = {"meta": {"python": platform.python_version(), "machine": platform.machine(),
+                       "database": Config.SQLALCHEMY_DATABASE_URI.split(":", 1)[0],
+                       "date": datetime.utcnow().isoformat(timespec="seconds")},
+              "results": results}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved baseline {args.baseline}")
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,78 +1,406 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import OrderedDict
 import os
+import re
+try:
+    import msgpack
+except ImportError:  # optional: listings then come as JSON
+    msgpack = None
+import threading
+import time
 
 API_BASE = os.environ.get("API_BASE", "http://127.0.0.1:5000")
-API = f"{API_BASE}/api"
-AUTH = f"{API_BASE}/auth"
+EXPORT_CHUNK = 64 * 1024
+# (connect, read) seconds; a stalled backend must not hang the UI forever
+TIMEOUT = (float(os.environ.get("API_CONNECT_TIMEOUT", "3")), float(os.environ.get("API_READ_TIMEOUT", "30")))
+RETRIES = int(os.environ.get("API_RETRIES", "3"))
+POOL_SIZE = 8
+MSGPACK = "application/x-msgpack"
+# Listing endpoints answer in MessagePack when asked; JSON stays acceptable as fallback
+LISTING_ACCEPT = f"{MSGPACK}, application/json;q=0.5" if msgpack is not None else "application/json"
+# Recent search first pages kept client-side: (entries, seconds before a re-query)
+SEARCH_CACHE_SIZE = 64
+SEARCH_CACHE_TTL = 30
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)  # same tokenizer as backend/search.py
+SEARCH_FIELDS = ("name", "phone", "email", "address", "area")
+MIN_PREFIX = 2  # as backend/search.py: shorter terms only match whole tokens
+
+def _terms(q):
+    return _TOKEN_RE.findall((q or "").lower())
+
+def _matches(donor, terms):
+    """Client-side twin of the server index: every term prefixes some token."""
+    tokens = []
+    for f in SEARCH_FIELDS:
+        v = donor.get(f)
+        if v:
+            tokens += _terms(str(v))
+            if f == "phone":
+                tokens.append("".join(ch for ch in str(v) if ch.isdigit()))
+    return all(any(tok.startswith(t) for tok in tokens) for t in terms)
+
+class SessionExpired(requests.HTTPError):
+    """The backend rejected the session token (401): it expired or was revoked."""
 
 class ApiClient:
-    def __init__(self):
+    def __init__(self, base=API_BASE, timeout=TIMEOUT, retries=RETRIES):
         self.username = None
+        self.api = f"{base}/api"
+        self.auth = f"{base}/auth"
+        self.timeout = timeout
+        self._validated = {}  # (url, params) -> (etag, json body) for conditional GETs
+        self._searches = OrderedDict()  # LRU: (q, other params, limit) -> (time, donors, next_cursor)
+        self._searches_lock = threading.Lock()
+        self.last_timing = None  # see _timing()
+        self.replica = None  # see attach_replica()
+        # Called (from whichever thread saw it) once when the session token is rejected
+        self.on_session_expired = None
+        self._auth_lock = threading.Lock()
+
+        # One keep-alive session for every call. Retries (with backoff) cover connection
+        # errors and 502/503/504 for idempotent methods only: never POST.
+        retry = Retry(total=retries, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                      allowed_methods=Retry.DEFAULT_ALLOWED_METHODS, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+
+    def _request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        r = self.session.request(method, url, **kwargs)
+        self.last_timing = self._timing(r)
+        if r.status_code == 401 and url.startswith(self.api):
+            self._session_expired()
+            r.close()
+            raise SessionExpired("Session expired, please log in again", response=r)
+        return r
+
+    def _session_expired(self):
+        # The first thread to notice drops the token and tells the window; calls
+        # racing with it just fail until login() sets a new one
+        with self._auth_lock:
+            if self.session.headers.pop("Authorization", None) is None:
+                return
+        if self.on_session_expired:
+            self.on_session_expired()
+
+    @staticmethod
+    def _timing(r):
+        """{"total", "app", "db"} in ms for one response: total is the client-side
+        round-trip, app/db come from the backend's Server-Timing header (when
+        SERVER_TIMING is enabled), so total - app is the network/transport share."""
+        timing = {"total": r.elapsed.total_seconds() * 1000}
+        for part in r.headers.get("Server-Timing", "").split(","):
+            name, _, rest = part.strip().partition(";")
+            for attr in rest.split(";"):
+                if attr.strip().startswith("dur="):
+                    try:
+                        timing[name] = float(attr.strip()[4:])
+                    except ValueError:
+                        pass
+        return timing
+
+    def close(self):
+        self.session.close()
+
+    def attach_replica(self, replica):
+        """Answer donor reads from a desktop.replica.Replica once it has synced, fall
+        back to it for stock when the backend is unreachable, and queue stock
+        adjustments in it while offline."""
+        self.replica = replica
+
+    def _local(self):
+        return self.replica if self.replica is not None and self.replica.ready else None
+
+    def _get_validated(self, url, params=None):
+        """GET with If-None-Match; a 304 reuses the body we already have."""
+        key = (url, tuple(sorted((params or {}).items())))
+        cached = self._validated.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+        r = self._request("GET", url, params=params, headers=headers)
+        if r.status_code == 304 and cached:
+            return cached[1]
+        r.raise_for_status()
+        body = r.json()
+        if r.headers.get("ETag"):
+            self._validated[key] = (r.headers["ETag"], body)
+        return body
 
     # Auth
     def login(self, username, password):
-        r = requests.post(f"{AUTH}/login", json={"username": username, "password": password})
+        r = self._request("POST", f"{self.auth}/login", json={"username": username, "password": password})
         r.raise_for_status()
-        self.username = r.json()["user"]["username"]
-        return r.json()["user"]
+        body = r.json()
+        self.username = body["user"]["username"]
+        # Sent on every later call (including the change feed and exports)
+        self.session.headers["Authorization"] = f"Bearer {body['token']}"
+        return body["user"]
 
     # Donors
-    def list_donors(self):
-        r = requests.get(f"{API}/donors")
-        r.raise_for_status()
-        return r.json()["donors"]
+    def list_donors_page(self, cursor=None, limit=None, fields=None):
+        """One keyset page: returns (donors, next_cursor); next_cursor is None on the last page.
+        With `fields`, only those columns are sent (as compact rows) and each donor dict
+        holds just them plus id."""
+        if self._local():
+            return self.replica.list_donors_page(cursor, limit, fields)
+        return self._donor_page(f"{self.api}/donors", {}, cursor, limit, fields)
+
+    def list_donors(self, limit=None):
+        """Iterate over all donors (newest first), fetching one page at a time."""
+        return self._iter_donors(f"{self.api}/donors", {}, limit)
 
     def get_donor(self, donor_id):
-        r = requests.get(f"{API}/donors/{donor_id}")
+        if self._local():
+            try:
+                return self.replica.get_donor(donor_id)
+            except KeyError:
+                pass  # newer than the last sync
+        r = self._request("GET", f"{self.api}/donors/{donor_id}")
         r.raise_for_status()
         return r.json()["donor"]
 
+    # Donor writes need the backend; the result goes into the replica at once
     def create_donor(self, payload):
-        r = requests.post(f"{API}/donors", json=payload)
+        r = self._request("POST", f"{self.api}/donors", json=payload)
+        self._forget_searches()
         r.raise_for_status()
-        return r.json()["donor"]
+        return self._mirror(r.json()["donor"])
 
     def update_donor(self, donor_id, payload):
-        r = requests.put(f"{API}/donors/{donor_id}", json=payload)
+        r = self._request("PUT", f"{self.api}/donors/{donor_id}", json=payload)
+        self._forget_searches()
         r.raise_for_status()
-        return r.json()["donor"]
+        return self._mirror(r.json()["donor"])
 
     def delete_donor(self, donor_id):
-        r = requests.delete(f"{API}/donors/{donor_id}")
+        r = self._request("DELETE", f"{self.api}/donors/{donor_id}")
+        self._forget_searches()
         r.raise_for_status()
+        if self.replica is not None:
+            self.replica.remove_donor(donor_id)
         return True
 
-    def search_donors(self, params):
-        r = requests.get(f"{API}/donors/search", params=params)
+    def _mirror(self, donor):
+        if self.replica is not None:
+            self.replica.put_donor(donor)
+        return donor
+
+    def search_donors_page(self, params, cursor=None, limit=None, fields=None):
+        """One page of search results. First pages are served from a small LRU when
+        possible: an exact repeat, or a narrowed query ("ali" -> "alice") whose
+        broader result set was complete, filtered locally. Narrowing only happens
+        where _matches agrees with the server: its prefix index ("matching":
+        "prefix") and terms of at least MIN_PREFIX chars. With a synced replica the
+        search runs entirely against its local index."""
+        if self._local():
+            return self.replica.search_donors_page(params, cursor, limit, fields)
+        if fields:
+            # The searched columns are needed for local narrowing
+            params = dict(params, fields=",".join(dict.fromkeys([*fields, *SEARCH_FIELDS])))
+        if cursor is None:
+            hit = self._cached_search(params, limit)
+            if hit is not None:
+                return hit
+        data = self._donor_listing(f"{self.api}/donors/search", params, cursor, limit)
+        donors, next_cursor = data["donors"], data.get("next_cursor")
+        if cursor is None:
+            self._remember_search(params, limit, donors, next_cursor, data.get("matching") == "prefix")
+        return donors, next_cursor
+
+    def _search_key(self, params, limit):
+        rest = tuple(sorted((k, v) for k, v in params.items() if k != "q"))
+        return " ".join(_terms(params.get("q"))), rest, limit
+
+    def _cached_search(self, params, limit):
+        key = self._search_key(params, limit)
+        terms = key[0].split()
+        now = time.monotonic()
+        with self._searches_lock:
+            exact = self._searches.get(key)
+            if exact and now - exact[0] < SEARCH_CACHE_TTL:
+                self._searches.move_to_end(key)
+                return list(exact[1]), exact[2]
+            if not terms or any(len(t) < MIN_PREFIX for t in terms):
+                return None
+            for (q, rest, lim), (at, donors, next_cursor, prefix) in reversed(self._searches.items()):
+                if not prefix or rest != key[1] or lim != limit or next_cursor is not None or now - at >= SEARCH_CACHE_TTL:
+                    continue
+                # Narrowing: every old term is a prefix of some new term, so the new
+                # result set is a subset of the old (complete) one.
+                old = q.split()
+                if old and all(any(t.startswith(o) for t in terms) for o in old):
+                    narrowed = [d for d in donors if _matches(d, terms)]
+                    self._searches[key] = (at, narrowed, None, True)
+                    return list(narrowed), None
+        return None
+
+    def _remember_search(self, params, limit, donors, next_cursor, prefix=False):
+        """`prefix`: the server matched with its prefix index, and every term was
+        long enough for _matches to agree with it, so the entry can be narrowed."""
+        prefix = prefix and all(len(t) >= MIN_PREFIX for t in _terms(params.get("q")))
+        with self._searches_lock:
+            self._searches[self._search_key(params, limit)] = (time.monotonic(), donors, next_cursor, prefix)
+            while len(self._searches) > SEARCH_CACHE_SIZE:
+                self._searches.popitem(last=False)
+
+    def _forget_searches(self):
+        # Any donor write may change any result set
+        with self._searches_lock:
+            self._searches.clear()
+
+    def search_donors(self, params, limit=None):
+        """Iterate over all donors matching `params`, fetching one page at a time."""
+        return self._iter_donors(f"{self.api}/donors/search", params, limit)
+
+    def bulk_import(self, filepath, chunk_size=None):
+        """Upload a CSV or NDJSON (.ndjson/.jsonl) donor file, streamed from disk.
+        Returns the server report: inserted, failed and per-row errors."""
+        ndjson = filepath.lower().endswith((".ndjson", ".jsonl"))
+        headers = {"Content-Type": "application/x-ndjson" if ndjson else "text/csv"}
+        params = {"chunk_size": chunk_size} if chunk_size else None
+        with open(filepath, "rb") as f:
+            r = self._request("POST", f"{self.api}/donors/bulk", data=f, params=params, headers=headers)
+        self._forget_searches()
+        r.raise_for_status()
+        return r.json()
+
+    def eligible_donors(self, blood_group, interval_days=56, area=None, compatible=True, limit=None):
+        params = {"blood_group": blood_group, "interval_days": interval_days, "compatible": int(compatible)}
+        if area:
+            params["area"] = area
+        if limit is not None:
+            params["limit"] = limit
+        r = self._request("GET", f"{self.api}/donors/eligible", params=params)
         r.raise_for_status()
         return r.json()["donors"]
 
+    def _donor_page(self, url, params, cursor, limit, fields=None):
+        data = self._donor_listing(url, params, cursor, limit, fields)
+        return data["donors"], data.get("next_cursor")
+
+    def _donor_listing(self, url, params, cursor, limit, fields=None):
+        """The listing response with "donors" as dicts, whichever shape was sent."""
+        params = dict(params)
+        if cursor is not None:
+            params["cursor"] = cursor
+        if limit is not None:
+            params["limit"] = limit
+        if fields:
+            params.setdefault("fields", ",".join(fields))
+        if "fields" in params:
+            params["shape"] = "rows"  # field names once, not per donor
+        data = self._get_listing(url, params)
+        if "rows" in data:
+            names = data["fields"]
+            data["donors"] = [dict(zip(names, row)) for row in data.pop("rows")]
+        return data
+
+    def _get_listing(self, url, params):
+        """GET a listing endpoint, negotiating MessagePack when available."""
+        r = self._request("GET", url, params=params, headers={"Accept": LISTING_ACCEPT})
+        r.raise_for_status()
+        if r.headers.get("Content-Type", "").startswith(MSGPACK):
+            return msgpack.unpackb(r.content, raw=False)
+        return r.json()
+
+    def _iter_donors(self, url, params, limit):
+        cursor = None
+        while True:
+            donors, cursor = self._donor_page(url, params, cursor, limit)
+            yield from donors
+            if cursor is None:
+                return
+
     # Stock
     def get_stock(self):
-        r = requests.get(f"{API}/stock")
+        try:
+            # Copy: pages sort/mutate the list and the cached body must stay intact
+            return [dict(s) for s in self._get_validated(f"{self.api}/stock")["stock"]]
+        except (requests.ConnectionError, requests.Timeout):
+            if self.replica is None:
+                raise
+            return self.replica.get_stock()
+
+    def adjust_stock(self, blood_group, delta, reason, queue=True):
+        """Apply one adjustment. If the backend cannot be reached and a replica is
+        attached, it is queued there for replay instead and {"queued": True, ...} is
+        returned. Only connection failures queue: after a read timeout the server may
+        already have applied it."""
+        try:
+            r = self._request("POST", f"{self.api}/stock/adjust", json={"blood_group": blood_group, "delta": delta, "reason": reason})
+        except requests.ConnectionError:
+            if not queue or self.replica is None:
+                raise
+            return self.replica.queue_adjust(blood_group, delta, reason)
         r.raise_for_status()
-        return r.json()["stock"]
+        return r.json()
 
-    def adjust_stock(self, blood_group, delta, reason):
-        r = requests.post(f"{API}/stock/adjust", json={"blood_group": blood_group, "delta": delta, "reason": reason})
+    def adjust_stock_batch(self, lines):
+        """Apply [{blood_group, delta, reason}, ...] all-or-nothing. Returns {"applied", "stock"}."""
+        r = self._request("POST", f"{self.api}/stock/batch", json={"lines": lines})
         r.raise_for_status()
         return r.json()
 
     def stock_movements(self, limit=100):
-        r = requests.get(f"{API}/stock/movements", params={"limit": limit})
+        try:
+            return self._get_listing(f"{self.api}/stock/movements", {"limit": limit})["movements"]
+        except (requests.ConnectionError, requests.Timeout):
+            if self.replica is None:
+                raise
+            return self.replica.stock_movements(limit)
+
+    def movements_page(self, params, cursor=None, limit=None):
+        """One page of movement history, newest first: returns (movements, next_cursor).
+        `params` may hold from/to (ISO dates, to exclusive), blood_group and reason."""
+        params = dict(params, shape="rows")
+        if cursor is not None:
+            params["cursor"] = cursor
+        if limit is not None:
+            params["limit"] = limit
+        data = self._get_listing(f"{self.api}/stock/movements", params)
+        names = data["fields"]
+        return [dict(zip(names, row)) for row in data["rows"]], data.get("next_cursor")
+
+    def stock_changes(self, since=None, wait=25):
+        """Long-poll the stock change feed; without `since` returns the current cursor."""
+        params = {} if since is None else {"since": since, "wait": wait}
+        # The server holds the request up to `wait` seconds, so allow for that
+        timeout = (self.timeout[0], self.timeout[1] + wait)
+        r = self._request("GET", f"{self.api}/stock/changes", params=params, timeout=timeout)
         r.raise_for_status()
-        return r.json()["movements"]
+        return r.json()
+
+    # Replica sync
+    def sync(self, cursor=None, limit=1000):
+        """One page of changes since `cursor` (None for a first, full sync)."""
+        params = {"limit": limit}
+        if cursor:
+            params["since"] = cursor
+        return self._get_listing(f"{self.api}/sync", params)
 
     # Analytics
     def analytics_summary(self, days=30):
-        r = requests.get(f"{API}/analytics/summary", params={"days": days})
-        r.raise_for_status()
-        return r.json()
+        return self._get_validated(f"{self.api}/analytics/summary", {"days": days})
 
     # Export
-    def export_donors_csv(self, filepath):
-        r = requests.get(f"{API}/export/donors.csv")
-        r.raise_for_status()
-        with open(filepath, "wb") as f:
-            f.write(r.content)
+    def export(self, kind, fmt, filepath, gzip=False, progress=None):
+        """Stream /api/export/<kind>.<fmt> to disk chunk by chunk.
+        `progress(bytes_written)` is called after every chunk."""
+        params = {"gzip": 1} if gzip else None
+        with self._request("GET", f"{self.api}/export/{kind}.{fmt}", params=params, stream=True) as r:
+            r.raise_for_status()
+            written = 0
+            with open(filepath, "wb") as f:
+                for chunk in r.iter_content(chunk_size=EXPORT_CHUNK):
+                    f.write(chunk)
+                    written += len(chunk)
+                    if progress:
+                        progress(written)
         return filepath
+
+    def export_donors_csv(self, filepath, progress=None):
+        return self.export("donors", "csv", filepath, progress=progress)
@@ -0,0 +1,65 @@
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Live stock updates. One background thread per window long-polls
+# /api/stock/changes; each batch of movements is delivered to the GUI thread via
+# the `changed` signal and the pages patch their views in place, so no page has
+# to poll or reload to see what other desks did.
+
+WAIT = 25          # seconds the server may hold each poll
+RETRY_DELAY = 5    # seconds between attempts while the backend is unreachable
+LOW_STOCK_THRESHOLD = 5
+
+
+class StockFeed(QObject):
+    changed = pyqtSignal(dict)  # {"cursor", "movements", "stock"}
+
+    def __init__(self, api, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="stock-feed", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        cursor = None
+        while not self._stop.is_set():
+            try:
+                if cursor is None:
+                    cursor = self.api.stock_changes()["cursor"]
+                    continue
+                changes = self.api.stock_changes(cursor, wait=WAIT)
+            except Exception:
+                self._stop.wait(RETRY_DELAY)
+                continue
+            cursor = changes["cursor"]
+            if changes["movements"] and not self._stop.is_set():
+                self.changed.emit(changes)
+
+
+def apply_to_summary(summary, changes):
+    """Fold a change batch into an /analytics/summary payload (in place), mirroring
+    how the server's daily rollup counts donations and issues."""
+    units = {s["blood_group"]: s for s in summary["stock"]}
+    for s in changes["stock"]:
+        if s["blood_group"] in units:
+            units[s["blood_group"]]["units"] = s["units"]
+        else:
+            summary["stock"].append(dict(s))
+    for m in changes["movements"]:
+        day = m["timestamp"][:10]
+        if m["reason"] == "donation":
+            summary["donations"][day] = summary["donations"].get(day, 0) + m["delta"]
+        elif m["reason"] in ("issue", "discard"):
+            summary["issues"][day] = summary["issues"].get(day, 0) - m["delta"]
+            if m["reason"] == "discard" and "discards" in summary:
+                summary["discards"][day] = summary["discards"].get(day, 0) - m["delta"]
+    summary["low_stock"] = [s["blood_group"] for s in summary["stock"] if s["units"] < LOW_STOCK_THRESHOLD]
+    return summary
@@ -0,0 +1,36 @@
+import json, os
+from PyQt5.QtCore import QUrl
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineSettings
+
+HTML_DIR = os.path.join(os.path.dirname(__file__), "assets", "html")
+
+
+class ChartView(QWebEngineView):
+    """A chart page loaded once; new data is pushed into it with runJavaScript.
+
+    The page must define `window.render(data)`, which builds its charts on the first
+    call and updates them in place afterwards. Data that arrives before the page
+    has finished loading is held and pushed on loadFinished."""
+
+    def __init__(self, page_name, parent=None):
+        super().__init__(parent)
+        self._ready = False
+        self._pending = None
+        self.loadFinished.connect(self._on_loaded)
+        # Loaded from disk so the page can use the scripts in vendor/ next to it; when
+        # those were never fetched it falls back to the CDN, which file:// pages may
+        # only reach with this attribute set
+        self.settings().setAttribute(QWebEngineSettings.LocalContentCanAccessRemoteUrls, True)
+        self.load(QUrl.fromLocalFile(os.path.join(HTML_DIR, page_name)))
+
+    def push(self, data):
+        if not self._ready:
+            self._pending = data
+            return
+        self.page().runJavaScript(f"render({json.dumps(data)});")
+
+    def _on_loaded(self, ok):
+        self._ready = ok
+        if ok and self._pending is not None:
+            data, self._pending = self._pending, None
+            self.push(data)
@@ -0,0 +1,113 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, pyqtSignal
+from .worker import DataLoader
+
+# (field, header) for the donor table
+COLUMNS = [
+    ("id", "ID"), ("name", "Name"), ("blood_group", "Blood Group"),
+    ("area", "Area"), ("phone", "Phone"), ("last_donation_date", "Last Donation"),
+]
+PAGE_SIZE = 200
+
+
+class PagedTableModel(QAbstractTableModel):
+    """Rows for a QTableView, filled a page at a time as the view scrolls.
+
+    `columns` is [(field, header)]. Rows live in one list per column (no per-cell
+    objects, no per-row dicts). `fetch(cursor, limit)` must return (rows,
+    next_cursor) like ApiClient.list_donors_page; pages are fetched in the
+    background via DataLoader and appended with beginInsertRows, so the view never
+    relayouts from scratch."""
+
+    error = pyqtSignal(str)
+
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.loader = DataLoader(self)
+        self.columns = columns
+        self._columns = {field: [] for field, _ in columns}
+        self._fetch = None
+        self._cursor = None
+        self._more = False
+        self._loading = False
+
+    # ---------- Source ----------
+
+    def set_source(self, fetch):
+        """Replace the rows with a new listing; the first page loads immediately."""
+        self.beginResetModel()
+        for col in self._columns.values():
+            col.clear()
+        self._fetch, self._cursor, self._more, self._loading = fetch, None, True, False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._more and not self._loading and self._fetch is not None
+
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+        self._loading = True
+        fetch, cursor = self._fetch, self._cursor
+        # Same key for every page: a set_source() supersedes pages still in flight
+        self.loader.run("page", lambda: fetch(cursor, PAGE_SIZE), self._append, self._failed)
+
+    def _append(self, page):
+        rows, next_cursor = page
+        self._loading = False
+        self._cursor, self._more = next_cursor, next_cursor is not None
+        if rows:
+            first = self.rowCount()
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._extend(rows)
+            self.endInsertRows()
+
+    def _failed(self, msg):
+        self._loading = False
+        self._more = False
+        self.error.emit(msg)
+
+    def _extend(self, rows):
+        for field, col in self._columns.items():
+            col.extend(r.get(field) for r in rows)
+
+    # ---------- Qt model API ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns["id"])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._columns[self.columns[index.column()][0]][index.row()]
+        if role == Qt.DisplayRole:
+            return "" if value is None else value if isinstance(value, int) else str(value)
+        if role == Qt.UserRole:  # sort key: real ints for IDs, empty last-donation sorts first
+            return value if value is not None else ""
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][1]
+        return None
+
+
+class DonorTableModel(PagedTableModel):
+    def __init__(self, parent=None):
+        super().__init__(COLUMNS, parent)
+
+    def donor_id(self, row):
+        return self._columns["id"][row]
+
+
+class DonorProxyModel(QSortFilterProxyModel):
+    """Sorting (and optional text filtering) over the rows loaded so far."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(Qt.UserRole)
+        self.setFilterKeyColumn(-1)  # match any column
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
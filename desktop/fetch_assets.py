@@ -0,0 +1,32 @@
+"""Download the third-party scripts the chart pages use into assets/html/vendor.
+
+Run once when setting up a desk (or on a machine with internet access, then copy
+the desktop folder): the pages load these files locally, so charts keep working
+on networks without internet access.
+
+    python -m desktop.fetch_assets
+"""
+import os
+import requests
+
+from .chart_view import HTML_DIR
+
+VENDOR_DIR = os.path.join(HTML_DIR, "vendor")
+# file name -> pinned URL
+ASSETS = {
+    "chart.umd.min.js": "https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js",
+}
+
+
+def main():
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    for name, url in ASSETS.items():
+        r = requests.get(url, timeout=30)
+        r.raise_for_status()
+        with open(os.path.join(VENDOR_DIR, name), "wb") as f:
+            f.write(r.content)
+        print(f"{name}: {len(r.content)} bytes")
+
+
+if __name__ == "__main__":
+    main()
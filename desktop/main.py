@@ -1,7 +1,9 @@
 import os, sys
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListWidget, QListWidgetItem, QStackedWidget, QLabel, QMessageBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from .api import ApiClient
+from .change_feed import StockFeed
+from .replica import Replica, ReplicaSync
 from .pages.login import LoginPage
 from .pages.dashboard import DashboardPage
 from .pages.donors import DonorsPage
@@ -15,9 +17,15 @@ def load_styles(app):
         app.setStyleSheet(f.read())
 
 class MainWindow(QMainWindow):
+    session_expired = pyqtSignal()  # emitted from any thread, handled on the GUI thread
+
     def __init__(self):
         super().__init__()
         self.api = ApiClient()
+        self.replica = Replica()
+        self.shell = None
+        self.api.on_session_expired = self.session_expired.emit
+        self.session_expired.connect(self._on_session_expired)
         self.setWindowTitle("Hospital Blood Desk")
         self.resize(1100, 700)
 
@@ -27,6 +35,11 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(self.stack)
 
     def _on_login_success(self, user):
+        if self.shell is not None:
+            # Signed in again after the session expired: carry on where we were
+            self.stack.setCurrentWidget(self.shell)
+            self.replica_sync.kick()
+            return
         # Build main app UI
         shell = QWidget()
         root = QHBoxLayout()
@@ -58,11 +71,36 @@ class MainWindow(QMainWindow):
 
         self.stack.addWidget(shell)
         self.stack.setCurrentWidget(shell)
+        self.shell = shell
         self.sidebar.setCurrentRow(0)
 
+        # Live stock updates from other desks, applied in place (no polling)
+        self.feed = StockFeed(self.api, self)
+        for p in [self.page_dashboard, self.page_inventory, self.page_analytics]:
+            self.feed.changed.connect(p.apply_changes)
+        self.feed.start()
+
+        # Local replica: donor reads and offline stock adjustments (see replica.py)
+        self.api.attach_replica(self.replica)
+        self.replica_sync = ReplicaSync(self.api, self.replica)
+        self.replica_sync.start()
+
+    def _on_session_expired(self):
+        # Background threads keep retrying and resume once the new token is set
+        self.login.reset("Your session has expired. Please log in again.")
+        self.stack.setCurrentWidget(self.login)
+
+    def closeEvent(self, event):
+        if getattr(self, "feed", None) is not None:
+            self.feed.stop()
+        if getattr(self, "replica_sync", None) is not None:
+            self.replica_sync.stop()
+        super().closeEvent(event)
+
     def stack_pages(self, index):
         self.pages.setCurrentIndex(index)
-        # Refresh page data when switching
+        # Refresh page data when switching; pages load in the background and
+        # supersede their own in-flight loads, so fast clicking never blocks.
         try:
             page = self.pages.currentWidget()
             if hasattr(page, "refresh"):
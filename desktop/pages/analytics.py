@@ -1,24 +1,34 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout
-from PyQt5.QtWebEngineWidgets import QWebEngineView
-import json, os
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
+import copy
+from ..worker import DataLoader
+from ..chart_view import ChartView
+from ..change_feed import apply_to_summary
 
 class AnalyticsPage(QWidget):
     def __init__(self, api):
         super().__init__()
         self.api = api
-        self.view = QWebEngineView()
+        self.loader = DataLoader(self)
+        self.data = None
+        self.view = ChartView("analytics.html")
+        self.loading = QLabel("Loading…")
+        self.loading.hide()
+        self.loader.busy.connect(self.loading.setVisible)
         layout = QVBoxLayout()
+        layout.addWidget(self.loading)
         layout.addWidget(self.view)
         self.setLayout(layout)
         self.refresh()
 
-    def _load_html(self, data):
-        path = os.path.join(os.path.dirname(__file__), "..", "assets", "html", "analytics.html")
-        with open(path, "r", encoding="utf-8") as f:
-            html = f.read()
-        html = html.replace("__DATA__", json.dumps(data))
-        self.view.setHtml(html)
-
     def refresh(self):
-        data = self.api.analytics_summary(days=30)
-        self._load_html(data)
+        self.loader.run("summary", lambda: self.api.analytics_summary(days=30), self._show)
+
+    def _show(self, data):
+        # Own copy: live changes are folded into it and the client's cached body must stay intact
+        self.data = copy.deepcopy(data)
+        self.view.push(self.data)
+
+    def apply_changes(self, changes):
+        """Patch the charts with stock movements from the live feed."""
+        if self.data is not None:
+            self.view.push(apply_to_summary(self.data, changes))
@@ -1,14 +1,20 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QLineEdit, QComboBox, QDialog, QLabel, QTextEdit, QSpinBox, QDateEdit, QMessageBox
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTableView, QHeaderView, QPushButton, QLineEdit, QComboBox, QDialog, QLabel, QTextEdit, QSpinBox, QDateEdit, QMessageBox
+from PyQt5.QtCore import Qt, QDate, QTimer
 from datetime import date
+from ..worker import DataLoader
+from ..donor_model import DonorTableModel, DonorProxyModel, COLUMNS
 
 BLOOD_GROUPS = ["O+","O-","A+","A-","B+","B-","AB+","AB-"]
+SEARCH_DEBOUNCE_MS = 250  # quiet time after the last keystroke before searching
+MIN_QUERY = 2             # the server index only prefix-matches 2+ characters
+TABLE_FIELDS = [field for field, _ in COLUMNS]  # the table never needs notes/address/timestamps
 
 class DonorDialog(QDialog):
     def __init__(self, api, donor=None, parent=None):
         super().__init__(parent)
         self.api = api
         self.donor = donor
+        self.loader = DataLoader(self)
         self.setWindowTitle("Donor Profile")
         self.resize(420, 520)
 
@@ -59,75 +65,106 @@ class DonorDialog(QDialog):
             "notes": self.notes.toPlainText().strip() or None,
             "active": True,
         }
-        try:
-            if self.donor:
-                self.api.update_donor(self.donor["id"], payload)
-            else:
-                self.api.create_donor(payload)
-            self.accept()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+        donor_id = self.donor["id"] if self.donor else None
+        if donor_id:
+            call = lambda: self.api.update_donor(donor_id, payload)
+        else:
+            call = lambda: self.api.create_donor(payload)
+
+        def failed(msg):
+            self.save.setEnabled(True)
+            QMessageBox.critical(self, "Error", msg)
+
+        self.save.setEnabled(False)
+        self.loader.run(None, call, lambda _: self.accept(), failed)
 
 class DonorsPage(QWidget):
     def __init__(self, api):
         super().__init__()
         self.api = api
-        self.table = QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels(["ID","Name","Blood Group","Area","Phone","Last Donation"])
-        self.table.cellDoubleClicked.connect(self.open_profile)
+        self.loader = DataLoader(self)
+
+        # Model/view: rows are paged in from the API as the table scrolls
+        self.model = DonorTableModel(self)
+        self.proxy = DonorProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.DescendingOrder)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.doubleClicked.connect(self.open_profile)
 
         self.search = QLineEdit(); self.search.setPlaceholderText("Search name/phone/email/area")
         self.bg = QComboBox(); self.bg.addItem("Any"); self.bg.addItems(BLOOD_GROUPS)
         self.btn_filter = QPushButton("Filter")
         self.btn_new = QPushButton("Add Donor")
+        self.loading = QLabel("Loading…"); self.loading.hide()
+        self.loader.busy.connect(self.loading.setVisible)
+        self.model.loader.busy.connect(self.loading.setVisible)
+        self.model.error.connect(lambda msg: QMessageBox.warning(self, "Loading donors failed", msg))
 
         hl = QHBoxLayout()
-        hl.addWidget(self.search); hl.addWidget(self.bg); hl.addWidget(self.btn_filter); hl.addStretch(); hl.addWidget(self.btn_new)
+        hl.addWidget(self.search); hl.addWidget(self.bg); hl.addWidget(self.btn_filter); hl.addWidget(self.loading); hl.addStretch(); hl.addWidget(self.btn_new)
 
         layout = QVBoxLayout()
         layout.addLayout(hl)
         layout.addWidget(self.table)
         self.setLayout(layout)
 
-        self.btn_filter.clicked.connect(self.apply_filter)
+        # Search as you type: each keystroke restarts the timer, so a burst of typing
+        # sends one request. A newer search supersedes the one in flight (the model's
+        # page loads share a DataLoader key) and repeats/narrowings hit the client cache.
+        self.debounce = QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(SEARCH_DEBOUNCE_MS)
+        self.debounce.timeout.connect(self.apply_filter)
+        self.search.textChanged.connect(self.debounce.start)
+        self.bg.currentIndexChanged.connect(lambda _: self.apply_filter())  # the index is not `force`
+        self.search.returnPressed.connect(lambda: self.apply_filter(force=True))
+        self.btn_filter.clicked.connect(lambda: self.apply_filter(force=True))
         self.btn_new.clicked.connect(self.add_new)
 
         self.refresh()
 
-    def populate(self, donors):
-        self.table.setRowCount(0)
-        for d in donors:
-            r = self.table.rowCount()
-            self.table.insertRow(r)
-            self.table.setItem(r, 0, QTableWidgetItem(str(d["id"])))
-            self.table.setItem(r, 1, QTableWidgetItem(d["name"]))
-            self.table.setItem(r, 2, QTableWidgetItem(d["blood_group"]))
-            self.table.setItem(r, 3, QTableWidgetItem(d.get("area","") or ""))
-            self.table.setItem(r, 4, QTableWidgetItem(d.get("phone","") or ""))
-            self.table.setItem(r, 5, QTableWidgetItem(d.get("last_donation_date","") or ""))
-        self.table.resizeColumnsToContents()
+    def _list_page(self, cursor, limit):
+        return self.api.list_donors_page(cursor, limit, fields=TABLE_FIELDS)
 
     def refresh(self):
-        donors = self.api.list_donors()
-        self.populate(donors)
-
-    def apply_filter(self):
+        self._params = {}
+        self.model.set_source(self._list_page)
+
+    def apply_filter(self, force=False):
+        self.debounce.stop()
+        q = self.search.text().strip()
+        if 0 < len(q) < MIN_QUERY:
+            return  # wait for more input
         params = {}
-        if self.search.text().strip():
-            params["q"] = self.search.text().strip()
+        if q:
+            params["q"] = q
         if self.bg.currentText() != "Any":
             params["blood_group"] = self.bg.currentText()
-        donors = self.api.search_donors(params)
-        self.populate(donors)
+        if params == self._params and not force:
+            return
+        self._params = params
+        if not params:
+            self.model.set_source(self._list_page)
+        else:
+            self.model.set_source(lambda cursor, limit: self.api.search_donors_page(params, cursor, limit, fields=TABLE_FIELDS))
 
     def add_new(self):
         dlg = DonorDialog(self.api, None, self)
         if dlg.exec_():
             self.refresh()
 
-    def open_profile(self, row, col):
-        donor_id = int(self.table.item(row, 0).text())
-        donor = self.api.get_donor(donor_id)
+    def open_profile(self, index):
+        donor_id = self.model.donor_id(self.proxy.mapToSource(index).row())
+        self.loader.run("profile", lambda: self.api.get_donor(donor_id), self._show_profile)
+
+    def _show_profile(self, donor):
         dlg = DonorDialog(self.api, donor, self)
         if dlg.exec_():
             self.refresh()
@@ -1,19 +1,79 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
-    QPushButton, QComboBox, QSpinBox, QLabel, QMessageBox, QFrame
+    QPushButton, QComboBox, QSpinBox, QLabel, QMessageBox, QFrame, QListWidget,
+    QDialog, QDateEdit, QTableView, QHeaderView
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QColor, QBrush
+from ..worker import DataLoader
+from ..donor_model import PagedTableModel
 
 BLOOD_GROUPS = ["O+", "O-", "A+", "A-", "B+", "B-", "AB+", "AB-"]
 REASONS = ["donation", "issue", "discard", "adjust"]
 LOW_STOCK_THRESHOLD = 5
+HISTORY_COLUMNS = [
+    ("timestamp", "Time (UTC)"), ("blood_group", "Group"), ("delta", "Δ Units"),
+    ("reason", "Reason"), ("user_id", "User"), ("id", "ID"),
+]
+
+
+class MovementHistoryDialog(QDialog):
+    """Stock movements for a date range, newest first, paged in as the table scrolls."""
+
+    def __init__(self, api, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.setWindowTitle("Stock Movement History")
+        self.resize(760, 520)
+
+        self.start = QDateEdit(QDate.currentDate().addMonths(-3))
+        self.end = QDateEdit(QDate.currentDate())
+        for d in (self.start, self.end):
+            d.setCalendarPopup(True)
+            d.setDisplayFormat("yyyy-MM-dd")
+        self.group = QComboBox(); self.group.addItem("Any"); self.group.addItems(BLOOD_GROUPS)
+        self.reason = QComboBox(); self.reason.addItem("Any"); self.reason.addItems(REASONS)
+        self.btn_show = QPushButton("Show")
+        self.loading = QLabel("Loading…"); self.loading.hide()
+
+        self.model = PagedTableModel(HISTORY_COLUMNS, self)
+        self.model.loader.busy.connect(self.loading.setVisible)
+        self.model.error.connect(lambda msg: QMessageBox.warning(self, "Loading history failed", msg))
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        hl = QHBoxLayout()
+        for w in (QLabel("From"), self.start, QLabel("To"), self.end, QLabel("Group"), self.group,
+                  QLabel("Reason"), self.reason, self.btn_show, self.loading):
+            hl.addWidget(w)
+        hl.addStretch(1)
+        layout = QVBoxLayout(self)
+        layout.addLayout(hl)
+        layout.addWidget(self.table)
+
+        self.btn_show.clicked.connect(self.load)
+        self.load()
+
+    def load(self):
+        # Both dates inclusive in the UI; the API's `to` is exclusive
+        params = {"from": self.start.date().toString("yyyy-MM-dd"),
+                  "to": self.end.date().addDays(1).toString("yyyy-MM-dd")}
+        if self.group.currentText() != "Any":
+            params["blood_group"] = self.group.currentText()
+        if self.reason.currentText() != "Any":
+            params["reason"] = self.reason.currentText()
+        self.model.set_source(lambda cursor, limit: self.api.movements_page(params, cursor, limit))
 
 
 class InventoryPage(QWidget):
     def __init__(self, api):
         super().__init__()
         self.api = api
+        self.loader = DataLoader(self)
 
         # === Stock table ===
         self.table = QTableWidget(0, 2)
@@ -43,7 +103,13 @@ class InventoryPage(QWidget):
         self.reason.setToolTip("Reason")
 
         self.btn_apply = QPushButton("Apply Change")
+        self.btn_queue = QPushButton("Add to Batch")
         self.btn_refresh = QPushButton("Refresh")
+        self.btn_history = QPushButton("History…")
+        self.loading = QLabel("Loading…")
+        self.loading.hide()
+        self.offline = QLabel("")  # adjustments queued while the backend is unreachable
+        self.loader.busy.connect(self.loading.setVisible)
 
         # Quick actions
         self.btn_quick_add = QPushButton("Receive +1 (Donation)")
@@ -57,21 +123,47 @@ class InventoryPage(QWidget):
         cl.addWidget(QLabel("Reason"))
         cl.addWidget(self.reason)
         cl.addWidget(self.btn_apply)
+        cl.addWidget(self.btn_queue)
         cl.addStretch(1)
         cl.addWidget(self.btn_quick_add)
         cl.addWidget(self.btn_quick_issue)
         cl.addWidget(self.btn_quick_discard)
         cl.addWidget(self.btn_refresh)
+        cl.addWidget(self.btn_history)
+        cl.addWidget(self.loading)
+        cl.addWidget(self.offline)
+
+        # === Batch queue (submitted as one all-or-nothing transaction) ===
+        self.pending = []
+        self.queue_list = QListWidget()
+        self.queue_list.setMaximumHeight(110)
+        self.btn_submit = QPushButton("Submit Batch")
+        self.btn_clear = QPushButton("Clear Batch")
+        batch = QFrame()
+        bl = QHBoxLayout(batch)
+        bl.setContentsMargins(0, 0, 0, 0)
+        bl.addWidget(self.queue_list, 1)
+        bb = QVBoxLayout()
+        bb.addWidget(self.btn_submit)
+        bb.addWidget(self.btn_clear)
+        bb.addStretch(1)
+        bl.addLayout(bb)
+        self._update_batch_buttons()
 
         # === Root layout ===
         root = QVBoxLayout()
         root.addWidget(controls)
+        root.addWidget(batch)
         root.addWidget(self.table)
         self.setLayout(root)
 
         # Events
         self.btn_apply.clicked.connect(self.apply_change)
+        self.btn_queue.clicked.connect(self.queue_change)
+        self.btn_submit.clicked.connect(self.submit_batch)
+        self.btn_clear.clicked.connect(self.clear_batch)
         self.btn_refresh.clicked.connect(self.refresh)
+        self.btn_history.clicked.connect(lambda: MovementHistoryDialog(self.api, self).exec_())
         self.btn_quick_add.clicked.connect(self.quick_add)
         self.btn_quick_issue.clicked.connect(self.quick_issue)
         self.btn_quick_discard.clicked.connect(self.quick_discard)
@@ -117,10 +209,17 @@ class InventoryPage(QWidget):
                 for c in range(self.table.columnCount()):
                     self.table.item(r, c).setBackground(clear)
 
+    def _update_batch_buttons(self):
+        self.btn_submit.setEnabled(bool(self.pending))
+        self.btn_clear.setEnabled(bool(self.pending))
+        self.btn_submit.setText(f"Submit Batch ({len(self.pending)})" if self.pending else "Submit Batch")
+
     # ---------- Data ops ----------
 
     def refresh(self):
-        stock = self.api.get_stock()
+        self.loader.run("stock", self.api.get_stock, self._populate)
+
+    def _populate(self, stock):
         # Keep the table ordered by standard groups
         order = {bg: i for i, bg in enumerate(BLOOD_GROUPS)}
         stock.sort(key=lambda s: order.get(s["blood_group"], 999))
@@ -135,28 +234,83 @@ class InventoryPage(QWidget):
         self.table.resizeColumnsToContents()
         self._highlight_rows()
 
+    def apply_changes(self, changes):
+        """Update unit counts in place from the live stock feed."""
+        units = {s["blood_group"]: s["units"] for s in changes["stock"]}
+        seen = set()
+        for r in range(self.table.rowCount()):
+            group = self.table.item(r, 0).text()
+            if group in units:
+                self.table.item(r, 1).setText(str(units[group]))
+                seen.add(group)
+        if set(units) - seen:
+            self.refresh()  # a group we are not showing yet
+        else:
+            self._highlight_rows()
+
     def _apply(self, bg: str, delta: int, reason: str):
-        try:
-            self.api.adjust_stock(bg, delta, reason)
-            self.refresh()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+        # Writes use key=None so quick repeated clicks are never dropped
+        self.loader.run(None, lambda: self.api.adjust_stock(bg, delta, reason),
+                        self._applied,
+                        lambda msg: QMessageBox.critical(self, "Error", msg))
+
+    def _applied(self, result):
+        if result.get("queued"):
+            self.offline.setText("Offline: changes will be sent when the server is back")
+        else:
+            self.offline.setText("")
+        self.refresh()
 
     # ---------- Actions ----------
 
-    def apply_change(self):
+    def _form_change(self):
+        """(group, delta, reason) from the controls, or None after warning the user."""
         bg = self.bg.currentText()
         delta = int(self.delta.value())
         reason = self.reason.currentText()
 
         if reason not in REASONS:
             QMessageBox.warning(self, "Invalid reason", "Please pick a valid reason.")
-            return
+            return None
         if delta == 0:
             QMessageBox.information(self, "No change", "Delta must be non-zero.")
+            return None
+        return bg, delta, reason
+
+    def apply_change(self):
+        change = self._form_change()
+        if change:
+            self._apply(*change)
+
+    def queue_change(self):
+        change = self._form_change()
+        if not change:
             return
+        bg, delta, reason = change
+        self.pending.append({"blood_group": bg, "delta": delta, "reason": reason})
+        self.queue_list.addItem(f"{bg}  {delta:+d}  ({reason})")
+        self._update_batch_buttons()
+
+    def submit_batch(self):
+        if not self.pending:
+            return
+        lines = list(self.pending)
+        self.btn_submit.setEnabled(False)
+
+        def done(result):
+            self.clear_batch()
+            self._populate(result["stock"])
+
+        def failed(msg):
+            self._update_batch_buttons()
+            QMessageBox.critical(self, "Batch rejected", f"No changes were applied.\n\n{msg}")
+
+        self.loader.run(None, lambda: self.api.adjust_stock_batch(lines), done, failed)
 
-        self._apply(bg, delta, reason)
+    def clear_batch(self):
+        self.pending = []
+        self.queue_list.clear()
+        self._update_batch_buttons()
 
     def quick_add(self):
         group = self._selected_or_dropdown_group()
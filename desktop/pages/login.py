@@ -1,20 +1,24 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QMessageBox
 from PyQt5.QtCore import Qt
 from ..api import ApiClient
+from ..worker import DataLoader
+
+SUBTITLE = "Manage donors & stock securely. Login below."
 
 class LoginPage(QWidget):
     def __init__(self, api: ApiClient, on_success):
         super().__init__()
         self.api = api
         self.on_success = on_success
+        self.loader = DataLoader(self)
 
         layout = QVBoxLayout()
         layout.setSpacing(12)
 
         title = QLabel("Hospital Blood Desk")
         title.setStyleSheet("font-size: 28px; font-weight: 800;")
-        subtitle = QLabel("Manage donors & stock securely. Login below.")
-        subtitle.setStyleSheet("color: #475569;")
+        self.subtitle = QLabel(SUBTITLE)
+        self.subtitle.setStyleSheet("color: #475569;")
 
         self.username = QLineEdit()
         self.username.setPlaceholderText("Username")
@@ -26,7 +30,7 @@ class LoginPage(QWidget):
         self.btn.clicked.connect(self._login)
 
         layout.addWidget(title, 0, Qt.AlignHCenter)
-        layout.addWidget(subtitle, 0, Qt.AlignHCenter)
+        layout.addWidget(self.subtitle, 0, Qt.AlignHCenter)
         layout.addSpacing(8)
         layout.addWidget(self.username)
         layout.addWidget(self.password)
@@ -34,11 +38,21 @@ class LoginPage(QWidget):
 
         self.setLayout(layout)
 
+    def reset(self, message=""):
+        """Back to an empty form, e.g. when the session expired."""
+        self.password.clear()
+        self.btn.setEnabled(True)
+        self.btn.setText("Login")
+        self.subtitle.setText(message or SUBTITLE)
+
     def _login(self):
         u = self.username.text().strip()
         p = self.password.text().strip()
-        try:
-            user = self.api.login(u, p)
-            self.on_success(user)
-        except Exception as e:
-            QMessageBox.critical(self, "Login failed", str(e))
+        def failed(msg):
+            self.btn.setEnabled(True)
+            self.btn.setText("Login")
+            QMessageBox.critical(self, "Login failed", msg)
+
+        self.btn.setEnabled(False)
+        self.btn.setText("Signing in…")
+        self.loader.run("login", lambda: self.api.login(u, p), self.on_success, failed)
@@ -1,22 +1,72 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QFileDialog, QLabel
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QFileDialog, QLabel, QCheckBox, QProgressDialog, QMessageBox
+from PyQt5.QtCore import Qt
+from ..worker import DataLoader
+
+# (button label, export kind, format, file filter)
+EXPORTS = [
+    ("Export Donors to CSV", "donors", "csv", "CSV Files (*.csv)"),
+    ("Export Donors to NDJSON", "donors", "ndjson", "NDJSON Files (*.ndjson)"),
+    ("Export Stock Movements to CSV", "movements", "csv", "CSV Files (*.csv)"),
+]
+
+class ExportCancelled(Exception):
+    pass
 
 class SettingsPage(QWidget):
     def __init__(self, api):
         super().__init__()
         self.api = api
+        self.loader = DataLoader(self)
         layout = QVBoxLayout()
-        self.btn_export = QPushButton("Export Donors to CSV")
+        for label, kind, fmt, file_filter in EXPORTS:
+            btn = QPushButton(label)
+            btn.clicked.connect(lambda _, k=kind, f=fmt, ff=file_filter: self.export(k, f, ff))
+            layout.addWidget(btn)
+        self.gzip = QCheckBox("Compress exports (gzip)")
         self.status = QLabel("")
-        layout.addWidget(self.btn_export)
+        layout.addWidget(self.gzip)
         layout.addWidget(self.status)
         layout.addStretch()
         self.setLayout(layout)
 
-        self.btn_export.clicked.connect(self.export_csv)
-
-    def export_csv(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save donors CSV", "donors.csv", "CSV Files (*.csv)")
+    def export(self, kind, fmt, file_filter):
+        name = f"{kind}.{fmt}"
+        if self.gzip.isChecked():
+            name += ".gz"
+            file_filter = "Gzip Files (*.gz)"
+        path, _ = QFileDialog.getSaveFileName(self, f"Save {kind} export", name, file_filter)
         if not path:
             return
-        file = self.api.export_donors_csv(path)
-        self.status.setText(f"Exported to {file}")
+
+        # Size is unknown up front (chunked stream), so show a busy bar with bytes written.
+        # The download runs in the worker pool; progress arrives as queued signals.
+        dlg = QProgressDialog(f"Exporting {kind}…", "Cancel", 0, 0, self)
+        dlg.setWindowModality(Qt.WindowModal)
+        dlg.setMinimumDuration(300)
+        gzip = self.gzip.isChecked()
+        cancelled = []  # set from the GUI thread, checked in the worker
+
+        def run(report):
+            def progress(written):
+                if cancelled:
+                    raise ExportCancelled()
+                report(written)
+            return self.api.export(kind, fmt, path, gzip=gzip, progress=progress)
+
+        def show_progress(written):
+            dlg.setLabelText(f"Exporting {kind}… {written / 1_048_576:.1f} MB")
+
+        def done(file):
+            dlg.close()
+            self.status.setText(f"Exported to {file}")
+
+        def failed(msg):
+            was_cancelled = bool(cancelled)
+            dlg.close()  # closing emits canceled(), so read the flag first
+            if was_cancelled:
+                self.status.setText("Export cancelled")
+            else:
+                QMessageBox.critical(self, "Export failed", msg)
+
+        dlg.canceled.connect(lambda: cancelled.append(True))
+        self.loader.run(None, run, done, failed, on_progress=show_progress)
@@ -0,0 +1,267 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import requests
+
+# Offline-first local replica. A SQLite file per desk mirrors donors (with an FTS5
+# index for search), stock and recent movements. It is kept current by
+# incremental pulls from /api/sync, whose cursor holds the (Donor.updated_at, id)
+# and StockMovement.id high-water marks. Donor reads are answered from it once
+# the first sync has finished; stock adjustments made while the backend is
+# unreachable wait in an outbox and are replayed, in order, when it is back.
+
+REPLICA_PATH = os.environ.get("REPLICA_PATH", os.path.join(os.path.expanduser("~"), ".blood_desk", "replica.db"))
+SYNC_INTERVAL = 15        # seconds between background syncs
+KEEP_MOVEMENT_DAYS = 90   # local movement history
+
+DONOR_COLUMNS = ("id", "name", "nic", "phone", "email", "address", "area", "blood_group", "age",
+                 "last_donation_date", "notes", "active", "created_at", "updated_at")
+MOVEMENT_COLUMNS = ("id", "blood_group", "delta", "reason", "timestamp", "user_id")
+FTS_COLUMNS = ("name", "phone", "email", "address", "area", "digits")
+# bm25 weights per FTS column, matching the server's FIELD_WEIGHTS
+FTS_WEIGHTS = (4, 3, 3, 1, 2, 3)
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS donors ({", ".join(c + (" INTEGER PRIMARY KEY" if c == "id" else "") for c in DONOR_COLUMNS)});
+CREATE INDEX IF NOT EXISTS ix_donors_group ON donors (blood_group, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS donors_fts USING fts5({", ".join(FTS_COLUMNS)});
+CREATE TABLE IF NOT EXISTS stock (blood_group TEXT PRIMARY KEY, id INTEGER, units INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS movements ({", ".join(c + (" INTEGER PRIMARY KEY" if c == "id" else "") for c in MOVEMENT_COLUMNS)});
+CREATE TABLE IF NOT EXISTS outbox (seq INTEGER PRIMARY KEY AUTOINCREMENT, blood_group TEXT, delta INTEGER,
+                                   reason TEXT, queued_at TEXT, error TEXT);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _fts_query(q):
+    # Every term required, each as a prefix (same semantics as the server index)
+    return " AND ".join(f'"{t}"*' for t in _TOKEN_RE.findall(q.lower()))
+
+
+class Replica:
+    def __init__(self, path=REPLICA_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self._lock = threading.RLock()  # one connection shared by the worker threads
+
+    # ---------- State ----------
+
+    def _meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def ready(self):
+        """True once a full initial sync has completed."""
+        with self._lock:
+            return self._meta("synced_at") is not None
+
+    # ---------- Sync ----------
+
+    def sync(self, api):
+        """Pull everything since the stored cursor, page by page. Each page is applied
+        in one transaction together with its cursor, so an interrupted sync resumes."""
+        pages = 0
+        while True:
+            with self._lock:
+                cursor = self._meta("cursor")
+            page = api.sync(cursor)
+            with self._lock, self.db:
+                self._apply(page)
+                self._set_meta("cursor", page["cursor"])
+                if not page["more"]:
+                    self._set_meta("synced_at", datetime.utcnow().isoformat())
+            pages += 1
+            if not page["more"]:
+                break
+        with self._lock, self.db:
+            cutoff = (datetime.utcnow() - timedelta(days=KEEP_MOVEMENT_DAYS)).isoformat()
+            self.db.execute("DELETE FROM movements WHERE timestamp < ?", (cutoff,))
+        return pages
+
+    def _apply(self, page):
+        fields = page["donor_fields"]
+        donors = [dict(zip(fields, row)) for row in page["donors"]]
+        for d in donors:
+            self._upsert_donor(d)
+        for donor_id in page["deleted"]:
+            self._delete_donor(donor_id)
+        mfields = page["movement_fields"]
+        self.db.executemany(
+            f"INSERT OR IGNORE INTO movements ({', '.join(MOVEMENT_COLUMNS)}) VALUES ({', '.join('?' * len(MOVEMENT_COLUMNS))})",
+            [tuple(dict(zip(mfields, m)).get(c) for c in MOVEMENT_COLUMNS) for m in page["movements"]])
+        self.db.execute("DELETE FROM stock")
+        self.db.executemany("INSERT INTO stock (blood_group, id, units) VALUES (?, ?, ?)",
+                            [(s["blood_group"], s["id"], s["units"]) for s in page["stock"]])
+        # Adjustments still waiting in the outbox are not in the server's numbers yet
+        for row in self.db.execute("SELECT blood_group, SUM(delta) FROM outbox WHERE error IS NULL GROUP BY blood_group").fetchall():
+            self.db.execute("UPDATE stock SET units = units + ? WHERE blood_group = ?", (row[1], row[0]))
+
+    def _upsert_donor(self, d):
+        values = [d.get(c) for c in DONOR_COLUMNS]
+        self.db.execute(f"INSERT OR REPLACE INTO donors ({', '.join(DONOR_COLUMNS)}) VALUES ({', '.join('?' * len(DONOR_COLUMNS))})", values)
+        self.db.execute("DELETE FROM donors_fts WHERE rowid = ?", (d["id"],))
+        digits = "".join(ch for ch in (d.get("phone") or "") if ch.isdigit())
+        self.db.execute(f"INSERT INTO donors_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (d["id"], d.get("name"), d.get("phone"), d.get("email"), d.get("address"), d.get("area"), digits))
+
+    def _delete_donor(self, donor_id):
+        self.db.execute("DELETE FROM donors WHERE id = ?", (donor_id,))
+        self.db.execute("DELETE FROM donors_fts WHERE rowid = ?", (donor_id,))
+
+    # Own writes are applied at once rather than waiting for the next sync
+    def put_donor(self, donor):
+        with self._lock, self.db:
+            self._upsert_donor(donor)
+
+    def remove_donor(self, donor_id):
+        with self._lock, self.db:
+            self._delete_donor(donor_id)
+
+    # ---------- Reads (same shapes as ApiClient) ----------
+
+    def _donors(self, sql, args, fields):
+        cols = ", ".join(fields or DONOR_COLUMNS)
+        with self._lock:
+            rows = self.db.execute(sql.format(cols=cols), args).fetchall()
+        return [dict(r) for r in rows]
+
+    def list_donors_page(self, cursor=None, limit=None, fields=None):
+        limit = limit or 100
+        where, args = ("WHERE id < ?", [cursor]) if cursor is not None else ("", [])
+        rows = self._donors(f"SELECT {{cols}} FROM donors {where} ORDER BY id DESC LIMIT ?", args + [limit + 1], fields)
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def search_donors_page(self, params, cursor=None, limit=None, fields=None):
+        """Donor search over the replica: FTS5 prefix match on q, plus the blood_group
+        and area filters. `cursor` is an offset into the ranked results."""
+        limit, offset = limit or 100, int(cursor or 0)
+        where, args = [], []
+        q = _fts_query(params.get("q") or "")
+        if params.get("blood_group"):
+            where.append("d.blood_group = ?")
+            args.append(params["blood_group"])
+        if params.get("area"):
+            where.append("d.area LIKE ?")
+            args.append(f"%{params['area']}%")
+        cols = ", ".join(f"d.{c}" for c in (fields or DONOR_COLUMNS))
+        if q:
+            sql = (f"SELECT {cols} FROM donors_fts f JOIN donors d ON d.id = f.rowid WHERE donors_fts MATCH ? "
+                   + "".join(f"AND {w} " for w in where)
+                   + f"ORDER BY bm25(donors_fts, {', '.join(map(str, FTS_WEIGHTS))}), d.id DESC LIMIT ? OFFSET ?")
+            args = [q] + args
+        else:
+            sql = (f"SELECT {cols} FROM donors d " + ("WHERE " + " AND ".join(where) + " " if where else "")
+                   + "ORDER BY d.id DESC LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = [dict(r) for r in self.db.execute(sql, args + [limit + 1, offset]).fetchall()]
+        next_cursor = offset + limit if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def get_donor(self, donor_id):
+        rows = self._donors("SELECT {cols} FROM donors WHERE id = ?", [donor_id], None)
+        if not rows:
+            raise KeyError(f"Donor {donor_id} not found")
+        return rows[0]
+
+    def get_stock(self):
+        with self._lock:
+            return [dict(r) for r in self.db.execute("SELECT id, blood_group, units FROM stock ORDER BY blood_group")]
+
+    def stock_movements(self, limit=100):
+        with self._lock:
+            return [dict(r) for r in self.db.execute(
+                f"SELECT {', '.join(MOVEMENT_COLUMNS)} FROM movements ORDER BY id DESC LIMIT ?", (limit,))]
+
+    # ---------- Offline stock adjustments ----------
+
+    def queue_adjust(self, blood_group, delta, reason):
+        """Record an adjustment for later replay and apply it to the local stock."""
+        with self._lock, self.db:
+            row = self.db.execute("SELECT units FROM stock WHERE blood_group = ?", (blood_group,)).fetchone()
+            units = (row[0] if row else 0) + delta
+            if units < 0:
+                raise ValueError(f"Not enough units of {blood_group} (offline)")
+            self.db.execute("INSERT OR REPLACE INTO stock (blood_group, id, units) VALUES "
+                            "(?, (SELECT id FROM stock WHERE blood_group = ?), ?)", (blood_group, blood_group, units))
+            self.db.execute("INSERT INTO outbox (blood_group, delta, reason, queued_at) VALUES (?, ?, ?, ?)",
+                            (blood_group, delta, reason, datetime.utcnow().isoformat()))
+        return {"stock": {"blood_group": blood_group, "units": units}, "movement": None, "queued": True}
+
+    def pending(self):
+        with self._lock:
+            return [dict(r) for r in self.db.execute("SELECT * FROM outbox ORDER BY seq")]
+
+    def replay(self, api):
+        """Send queued adjustments in order. Stops at the first connection failure,
+        expired session or server error; one the server rejects (e.g. stock ran out
+        meanwhile) is kept with its error and skipped. Returns the number sent."""
+        sent = 0
+        for item in self.pending():
+            if item["error"]:
+                continue
+            try:
+                api.adjust_stock(item["blood_group"], item["delta"], item["reason"], queue=False)
+            except requests.ConnectionError:
+                break
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code == 401 or e.response.status_code >= 500:
+                    break  # logged out or server trouble: not this adjustment's fault, retry later
+                with self._lock, self.db:
+                    self.db.execute("UPDATE outbox SET error = ? WHERE seq = ?", (str(e), item["seq"]))
+                continue
+            except requests.Timeout:
+                # Sent but unanswered: it may have been applied, so never resend blindly
+                with self._lock, self.db:
+                    self.db.execute("UPDATE outbox SET error = ? WHERE seq = ?",
+                                    ("No response from server; check stock movements before retrying", item["seq"]))
+                break
+            with self._lock, self.db:
+                self.db.execute("DELETE FROM outbox WHERE seq = ?", (item["seq"],))
+            sent += 1
+        return sent
+
+
+class ReplicaSync:
+    """Background thread: replay the outbox, then pull changes, every SYNC_INTERVAL."""
+
+    def __init__(self, api, replica, interval=SYNC_INTERVAL):
+        self.api, self.replica, self.interval = api, replica, interval
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="replica-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def kick(self):
+        """Sync now instead of waiting for the interval."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.replica.replay(self.api)
+                self.replica.sync(self.api)
+            except requests.RequestException:
+                pass  # offline: try again next round
+            self._wake.wait(self.interval)
+            self._wake.clear()
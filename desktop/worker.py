@@ -0,0 +1,91 @@
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from PyQt5.QtWidgets import QMessageBox
+
+# Background execution for ApiClient calls. Pages hand a callable to a DataLoader;
+# it runs on the shared QThreadPool and the result comes back on the GUI thread
+# through a queued signal, so the window never waits on the network.
+
+
+class _TaskSignals(QObject):
+    # key, token, ok, payload (result or error message)
+    finished = pyqtSignal(object, int, bool, object)
+    progress = pyqtSignal(object)
+
+
+class _Task(QRunnable):
+    def __init__(self, key, token, fn):
+        super().__init__()
+        self.key, self.token, self.fn = key, token, fn
+        self.signals = _TaskSignals()
+
+    def run(self):
+        try:
+            result = self.fn()
+        except Exception as e:
+            self.signals.finished.emit(self.key, self.token, False, str(e))
+        else:
+            self.signals.finished.emit(self.key, self.token, True, result)
+
+
+class DataLoader(QObject):
+    """Runs callables off the GUI thread and delivers results via signals.
+
+    Calls sharing a `key` supersede each other: a queued call that has not started
+    is dropped, and the result of an older in-flight call is ignored, so only the
+    latest request for that key reaches the page. Use key=None for writes, which
+    must never be dropped. `busy` flips while anything is outstanding."""
+
+    busy = pyqtSignal(bool)
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._tokens = {}    # key -> latest token issued
+        self._tasks = {}     # token -> (task, on_done, on_error)
+        self._next = 0
+
+    def run(self, key, fn, on_done=None, on_error=None, on_progress=None):
+        """Run `fn()` in the pool. With `on_progress`, `fn` is called as fn(report)
+        and report(value) may be called from the worker to update the GUI."""
+        self._next += 1
+        token = self._next
+        if key is not None:
+            old = self._tokens.get(key)
+            # The pool deletes a task once it has run, possibly before its result
+            # reaches _finished; a deleted task has started, so it cannot be taken
+            if old in self._tasks and not sip.isdeleted(self._tasks[old][0]) and self.pool.tryTake(self._tasks[old][0]):
+                self._forget(old)
+            self._tokens[key] = token
+
+        task = _Task(key, token, fn)
+        if on_progress is not None:
+            task.signals.progress.connect(on_progress)
+            task.fn = lambda: fn(task.signals.progress.emit)
+        task.signals.finished.connect(self._finished)
+        self._tasks[token] = (task, on_done, on_error)
+        if len(self._tasks) == 1:
+            self.busy.emit(True)
+        self.pool.start(task)
+        return token
+
+    def _forget(self, token):
+        self._tasks.pop(token, None)
+        if not self._tasks:
+            self.busy.emit(False)
+
+    @pyqtSlot(object, int, bool, object)
+    def _finished(self, key, token, ok, payload):
+        entry = self._tasks.get(token)
+        self._forget(token)
+        if entry is None or (key is not None and self._tokens.get(key) != token):
+            return  # superseded
+        _, on_done, on_error = entry
+        if ok:
+            if on_done:
+                on_done(payload)
+        elif on_error:
+            on_error(payload)
+        else:
+            parent = self.parent()
+            QMessageBox.warning(parent if parent is not None and parent.isWidgetType() else None, "Request failed", payload)
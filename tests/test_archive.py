@@ -0,0 +1,50 @@
+import csv
+import gzip
+from datetime import datetime
+
+import pytest
+
+from backend import archive
+from backend.config import Config
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'archive.db'}")
+    from backend.app import create_app
+    from backend.db import db
+    from backend.models import StockMovement
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        for i, month in enumerate([1, 1, 1, 2, 2, 3, 9], start=1):
+            db.session.add(StockMovement(id=i, blood_group="O+", delta=1, reason="donation",
+                                         timestamp=datetime(2025, month, 10, 8, i)))
+        db.session.commit()
+        yield app
+
+
+def _ids(path):
+    with gzip.open(path, "rt", newline="") as f:
+        return [int(r["id"]) for r in csv.DictReader(f)]
+
+
+def test_export_failure_is_redone_by_the_next_run(app, tmp_path, monkeypatch):
+    out = tmp_path / "export"
+    real = archive.export_month
+
+    def disk_full(month, export_dir):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(archive, "export_month", disk_full)
+    with pytest.raises(OSError):
+        archive.archive(datetime(2025, 4, 1), chunk=2, export_dir=str(out), pause=0)
+    assert archive.pending(datetime(2025, 4, 1)) == 0  # the rows did move
+
+    monkeypatch.setattr(archive, "export_month", real)
+    assert archive.archive(datetime(2025, 4, 1), chunk=2, export_dir=str(out), pause=0) == 0
+    assert _ids(out / "movements-2025-01.csv.gz") == [1, 2, 3]
+    assert _ids(out / "movements-2025-02.csv.gz") == [4, 5]
+    assert _ids(out / "movements-2025-03.csv.gz") == [6]
+    assert not (out / ".pending").exists()
+    assert sorted(p.name for p in out.iterdir()) == [f"movements-2025-0{m}.csv.gz" for m in (1, 2, 3)]
@@ -0,0 +1,16 @@
+from backend.cache import ReadCache
+
+
+def test_result_computed_across_invalidation_is_not_stored():
+    cache, calls = ReadCache(), []
+
+    def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            cache.invalidate()  # a stock write lands while the first read runs
+        return {"units": len(calls)}
+
+    assert cache.get("stock", compute, ttl=60)[0] == b'{"units":1}'
+    # Same second as the invalidation: still recomputed, then cached
+    assert cache.get("stock", compute, ttl=60)[0] == b'{"units":2}'
+    assert cache.get("stock", compute, ttl=60)[0] == b'{"units":2}'
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.config import Config
+from backend.changes import parse_cursor, format_cursor, movements_after
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'changes.db'}")
+    from backend.app import create_app
+    from backend.db import db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def _add(*ids, age=60):
+    from backend.db import db
+    from backend.models import StockMovement
+    for i in ids:
+        db.session.add(StockMovement(id=i, blood_group="O+", delta=1, reason="donation",
+                                     timestamp=datetime.utcnow() - timedelta(seconds=age)))
+    db.session.commit()
+
+
+def test_cursor_round_trip():
+    seen = {12, 13, 14, 20, 22, 23}
+    raw = format_cursor(10, seen)
+    assert raw == "10:12-14,20,22-23"
+    assert parse_cursor(raw) == (10, seen)
+    assert parse_cursor("7") == (7, set())
+    assert format_cursor(7, {3, 7}) == "7"  # ids at or below the hold are implied
+
+
+@pytest.mark.parametrize("raw", [
+    "x", "-1", "10:5", "10:10", "10:14-12", "10:20,15", "10:12-14,13-16", "0:1-3000000",
+])
+def test_parse_rejects_bad_cursors(raw):
+    with pytest.raises(ValueError):
+        parse_cursor(raw)
+
+
+def test_format_caps_seen_ids(monkeypatch):
+    monkeypatch.setattr(Config, "CHANGES_MAX_SEEN", 3)
+    assert format_cursor(0, {1, 2, 5, 8, 9}) == "2:5,8-9"
+    parse_cursor(format_cursor(0, range(1, 100)))  # always parseable
+
+
+def test_movements_after_waits_for_late_commits(app):
+    _add(1, 2)
+    _add(3, 5, age=0)  # id 4 not committed yet
+    rows, cursor, more = movements_after("0", 10)
+    assert [m.id for m in rows] == [1, 2, 3, 5] and not more
+    assert cursor == "2:3,5"  # hold stops before the unsettled rows
+
+    _add(4, age=0)
+    rows, cursor, _ = movements_after(cursor, 10)
+    assert [m.id for m in rows] == [4]
+    assert movements_after(cursor, 10)[0] == []
+
+
+def test_movements_after_pages_and_settles(app):
+    _add(1, 2, 3, 4, 5)
+    rows, cursor, more = movements_after("0", 2)
+    assert [m.id for m in rows] == [1, 2] and more and cursor == "2"
+    rows, cursor, more = movements_after(cursor, 10)
+    assert [m.id for m in rows] == [3, 4, 5] and not more and cursor == "5"
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.config import Config
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'sync.db'}")
+    monkeypatch.setattr(Config, "API_AUTH", False)
+    from backend.app import create_app
+    from backend.db import db
+    from backend.models import Stock, BLOOD_GROUPS
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(Stock(blood_group=g, units=0) for g in BLOOD_GROUPS)
+        db.session.commit()
+    app.db = db
+    return app.test_client()
+
+
+def _sync(client, cursor=None):
+    r = client.get("/api/sync", query_string={"since": cursor} if cursor else {})
+    assert r.status_code == 200, r.get_json()
+    return r.get_json()
+
+
+def _movement(client, id, age):
+    from backend.models import StockMovement
+    with client.application.app_context():
+        client.application.db.session.add(StockMovement(
+            id=id, blood_group="O+", delta=1, reason="donation",
+            timestamp=datetime.utcnow() - timedelta(seconds=age)))
+        client.application.db.session.commit()
+
+
+def test_sync_with_no_donors_keeps_working(client):
+    first = _sync(client)
+    assert first["donors"] == [] and not first["more"]
+    again = _sync(client, first["cursor"])
+    assert again["donors"] == [] and again["deleted"] == []
+    _movement(client, 1, age=60)
+    assert [m[0] for m in _sync(client, again["cursor"])["movements"]] == [1]
+
+
+def test_sync_accepts_cursor_from_empty_donor_table_on_older_servers(client):
+    legacy = f"{datetime.min.isoformat()}~0~0"
+    assert _sync(client, legacy)["deleted"] == []
+
+
+def test_sync_delivers_movement_whose_lower_id_commits_late(client):
+    _movement(client, 1, age=60)
+    cursor = _sync(client)["cursor"]
+    _movement(client, 3, age=0)  # id 2 still in flight
+    page = _sync(client, cursor)
+    assert [m[0] for m in page["movements"]] == [3]
+    _movement(client, 2, age=0)
+    page = _sync(client, page["cursor"])
+    assert [m[0] for m in page["movements"]] == [2]
+    assert _sync(client, page["cursor"])["movements"] == []